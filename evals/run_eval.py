@@ -5,56 +5,120 @@ run_eval.py — lightweight evaluation harness for Prompt Mode
 Usage:
     python run_eval.py --mode v1 --task examples/tasks/email_tone_fix.md
     python run_eval.py --mode v2 --task examples/tasks/sql_query_review.md
+    python run_eval.py --mode v2 --tasks "examples/tasks/*.md" --qpm 240
+    python run_eval.py --mode v2 --tasks "examples/tasks/*.md" --batch
 """
 
 import argparse
-import json
+import asyncio
+import glob
 from pathlib import Path
-from src.promptmode.core import PromptModeV1, PromptModeV2
-from src.promptmode.llm import LocalMock
+from typing import List
+
+from prompt_mode import utils
+from prompt_mode.core import PromptModeV1, PromptModeV2
+from prompt_mode.llm import LocalMock
+from prompt_mode.schemas import V1Config, V2Config
 
 
 def load_task(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
 
-def save_transcript(lines, out_path: Path):
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8") as f:
-        for line in lines:
-            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+def save_transcript(passes, out_path: Path):
+    utils.write_jsonl_models(out_path, passes)
 
 
-def run_eval(mode: str, task_path: Path, out_dir: Path):
-    task_text = load_task(task_path)
+def make_engine(mode: str):
     model = LocalMock()
 
+    # Transcripts are the diff's consumer, so evals always record it
     if mode == "v1":
-        engine = PromptModeV1(model)
-    elif mode == "v2":
-        engine = PromptModeV2(model)
-    else:
-        raise ValueError(f"Unsupported mode: {mode}")
+        return PromptModeV1(model, config=V1Config(record_diff=True))
+    if mode == "v2":
+        return PromptModeV2(model, config=V2Config(record_diff=True))
+    raise ValueError(f"Unsupported mode: {mode}")
 
-    transcript = list(engine.run(task_text))
 
+def _save_result(mode: str, task_path: Path, result, out_dir: Path):
     # name output based on mode + task stem
     out_file = out_dir / f"{mode}_{task_path.stem}.jsonl"
-    save_transcript(transcript, out_file)
+    save_transcript(result.passes, out_file)
 
     print(f"[OK] Saved transcript to {out_file}")
 
 
+def run_eval(mode: str, task_path: Path, out_dir: Path):
+    engine = make_engine(mode)
+    result = engine.run(load_task(task_path))
+    _save_result(mode, task_path, result, out_dir)
+
+
+async def run_eval_many(
+    mode: str, task_paths: List[Path], out_dir: Path, qpm: int = 240
+):
+    """
+    Evaluate many tasks concurrently.
+
+    Model calls from all tasks are interleaved; in-flight calls are bounded by
+    the provider's queries-per-minute budget (QPM / 60).
+    """
+    engine = make_engine(mode)
+    results = await engine.arun_batch(
+        [load_task(p) for p in task_paths], max_concurrency=qpm // 60
+    )
+    for path, result in zip(task_paths, results):
+        _save_result(mode, path, result, out_dir)
+
+
+def run_eval_batch(mode: str, task_paths: List[Path], out_dir: Path):
+    """Evaluate many tasks in lockstep; each phase goes to the model as one batch."""
+    engine = make_engine(mode)
+    results = engine.run_batch([load_task(p) for p in task_paths])
+    for path, result in zip(task_paths, results):
+        _save_result(mode, path, result, out_dir)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run Prompt Mode eval on a task")
-    parser.add_argument("--mode", required=True, choices=["v1", "v2"], help="Prompt Mode version")
-    parser.add_argument("--task", required=True, type=Path, help="Path to task .md file")
     parser.add_argument(
-        "--out", default="examples/transcripts", type=Path, help="Directory for transcript output"
+        "--mode", required=True, choices=["v1", "v2"], help="Prompt Mode version"
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--task", type=Path, help="Path to task .md file")
+    group.add_argument(
+        "--tasks", type=str, help="Glob of task .md files to run concurrently"
+    )
+    parser.add_argument(
+        "--out",
+        default="examples/transcripts",
+        type=Path,
+        help="Directory for transcript output",
+    )
+    parser.add_argument(
+        "--qpm",
+        default=240,
+        type=int,
+        help="Provider queries-per-minute budget (bounds concurrency)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="With --tasks: submit each phase across tasks as one generate_batch call",
     )
     args = parser.parse_args()
 
-    run_eval(args.mode, args.task, args.out)
+    if args.task:
+        run_eval(args.mode, args.task, args.out)
+        return
+
+    task_paths = sorted(Path(p) for p in glob.glob(args.tasks))
+    if not task_paths:
+        parser.error(f"No task files match: {args.tasks}")
+    if args.batch:
+        run_eval_batch(args.mode, task_paths, args.out)
+        return
+    asyncio.run(run_eval_many(args.mode, task_paths, args.out, qpm=args.qpm))
 
 
 if __name__ == "__main__":
@@ -7,22 +7,62 @@ Example:
 """
 
 import argparse
+import contextlib
 import os
-from pathlib import Path
 import sys
-import json
+from pathlib import Path
 
+from prompt_mode import utils
 from prompt_mode.core import PromptModeV1, PromptModeV2
-from prompt_mode.llm import LocalMock, OpenAIAdapter
+
+# Only the mock is imported eagerly; real adapters (and their SDKs) load on demand below.
+from prompt_mode.llm.mock import LocalMock
+from prompt_mode.schemas import V2Config
+from prompt_mode.semcache import SemanticCache
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Run Prompt Mode V1 or V2 on a task file.")
-    parser.add_argument("--mode", choices=["v1", "v2"], required=True, help="Prompt Mode version to run.")
-    parser.add_argument("--task", type=str, required=True, help="Path to task file (Markdown or text).")
-    parser.add_argument("--passes", type=int, default=1, help="Number of passes (V2 only).")
-    parser.add_argument("--mock", action="store_true", help="Use LocalMock instead of real model.")
+    parser = argparse.ArgumentParser(
+        description="Run Prompt Mode V1 or V2 on a task file."
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["v1", "v2"],
+        required=True,
+        help="Prompt Mode version to run.",
+    )
+    parser.add_argument(
+        "--task", type=str, required=True, help="Path to task file (Markdown or text)."
+    )
+    parser.add_argument(
+        "--passes", type=int, default=1, help="Number of passes (V2 only)."
+    )
+    parser.add_argument(
+        "--mock", action="store_true", help="Use LocalMock instead of real model."
+    )
+    parser.add_argument(
+        "--provider",
+        choices=["openai", "anthropic"],
+        default="openai",
+        help="Real model backend (ignored with --mock).",
+    )
     parser.add_argument("--save", type=str, help="Path to save run transcript (JSONL).")
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=".prompt_mode_cache.sqlite3",
+        help="Cache low-temperature responses in a sqlite file (default: .prompt_mode_cache.sqlite3).",
+    )
+    parser.add_argument(
+        "--semcache",
+        action="store_true",
+        help="Reuse critiques for near-duplicate drafts (semantic cache).",
+    )
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="V2 only: draft all passes at once, judge them in one call, revise the best (disables early stop).",
+    )
     args = parser.parse_args()
 
     task_path = Path(args.task)
@@ -35,35 +75,62 @@ def main():
     # Model selection
     if args.mock or "PM_FORCE_MOCK" in os.environ:
         model = LocalMock()
+    elif args.provider == "anthropic":
+        api_key = os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            sys.stderr.write("No ANTHROPIC_API_KEY found. Use --mock for local run.\n")
+            sys.exit(1)
+        from prompt_mode.llm.anthropic_adapter import AnthropicAdapter
+
+        model = AnthropicAdapter(api_key=api_key)
     else:
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             sys.stderr.write("No OPENAI_API_KEY found. Use --mock for local run.\n")
             sys.exit(1)
+        from prompt_mode.llm.openai_adapter import OpenAIAdapter
+
         model = OpenAIAdapter(api_key=api_key)
 
+    if args.cache:
+        # Lazy: keeps sqlite3 off the default start path
+        from prompt_mode.cache import ResponseCache
+        from prompt_mode.llm.caching import CachingLLM
+
+        model = CachingLLM(model, ResponseCache(args.cache))
+
+    critic_cache = SemanticCache() if args.semcache else None
+
     # Orchestration
     if args.mode == "v1":
-        runner = PromptModeV1(model)
-        result = runner.run(task_text)
+        runner = PromptModeV1(model, critic_cache=critic_cache)
     elif args.mode == "v2":
-        runner = PromptModeV2(model, max_passes=args.passes)
-        result = runner.run(task_text)
+        config = V2Config(early_stop_score=None) if args.speculative else V2Config()
+        runner = PromptModeV2(
+            model,
+            max_passes=args.passes,
+            config=config,
+            critic_cache=critic_cache,
+            speculative=args.speculative,
+        )
     else:
         sys.stderr.write(f"Invalid mode: {args.mode}\n")
         sys.exit(1)
 
+    # Transcript (if requested) is streamed pass by pass while the run progresses
+    save_path = Path(args.save) if args.save else None
+    if save_path is not None:
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+    with (
+        save_path.open("wb", buffering=utils.JSONL_WRITE_BUFFER)
+        if save_path is not None
+        else contextlib.nullcontext()
+    ) as sink:
+        result = runner.run(task_text, transcript_sink=sink)
+
     # Output to stdout
     print("\n=== FINAL OUTPUT ===\n")
     print(result.final_output)
     print("\n=== SUMMARY ===")
     print(f"Passes: {len(result.passes)}")
     print(f"Token estimate: {result.token_count}")
-
-    # Save transcript if requested
-    if args.save:
-        save_path = Path(args.save)
-        save_path.parent.mkdir(parents=True, exist_ok=True)
-        with save_path.open("w", encoding="utf-8") as f:
-            for pass_record in result.passes:
-                f.write(json.dumps(pass_record.model_dump(), ensure_ascii=False) + "\n")
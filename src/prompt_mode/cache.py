@@ -0,0 +1,73 @@
+# src/prompt_mode/cache.py
+"""
+Exact-match response cache for prompt-mode-min.
+
+- ResponseCache: tiny key/value store on stdlib sqlite3 with per-entry TTL.
+- Keys are opaque strings (llm.caching.CachingLLM hashes messages + params).
+
+Design goals:
+- No extra dependencies; ":memory:" for tests, a file path for repeated evals.
+- Expired entries are treated as misses and pruned lazily.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ResponseCache:
+    """
+    sqlite3-backed cache of generated text.
+
+    Safe to share across threads (agenerate may run generate in a worker thread).
+    """
+
+    path: str = ":memory:"
+    default_ttl_seconds: int = 7 * 24 * 3600
+    _conn: Optional[sqlite3.Connection] = None
+    _lock: Optional[threading.Lock] = None
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None if missing/expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < time.time():
+                with self._conn:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        """Store `value` under `key` for `ttl` seconds (default_ttl_seconds if None)."""
+        expires_at = time.time() + (self.default_ttl_seconds if ttl is None else ttl)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
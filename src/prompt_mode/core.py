@@ -5,6 +5,9 @@ Core orchestration for prompt-mode-min.
 Implements:
 - PromptModeV1: draft -> critique -> single revision
 - PromptModeV2: plan -> (draft -> critique -> revision) * N with early stop
+  (or, with speculative=True and no early stop: plan -> N drafts at once -> judge -> revision)
+
+Both expose `run()` (blocking) and `arun()` (asyncio) over the same flow.
 
 Design goals:
 - Small, readable, and testable with LocalMock.
@@ -12,26 +15,48 @@ Design goals:
 - Persist intermediate PassRecords; return a RunResult.
 
 Notes:
-- Prompts are loaded from ./prompts/*. Keep them short and auditable.
+- Prompts are loaded from ./prompts/* (or the inline defaults with PM_BAKED_PROMPTS=1).
+  Keep them short and auditable.
 - "Timeouts" are cooperative; adapters should keep calls fast in tests.
 """
 
 from __future__ import annotations
 
+import contextlib
+import functools
+import hashlib
+import json
+import os
 import re
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
 
+from . import utils
 from .llm import LLM, Message
 from .schemas import (
     PassRecord,
     RunResult,
     V1Config,
     V2Config,
+    build_pass_record,
+    build_run_result,
 )
-from . import utils
+from .semcache import SemanticCache
+
+if TYPE_CHECKING:  # asyncio is imported lazily: it costs ~35 ms on a blocking CLI start
+    import asyncio
 
 
 # -------------------------
@@ -41,7 +66,17 @@ from . import utils
 _PROMPTS_DIR = Path(__file__).parent / "prompts"
 
 
+@functools.lru_cache(maxsize=None)
 def _read_prompt_file(name: str, default: str) -> str:
+    """
+    Load prompts/<name>, falling back to `default` if the file is missing.
+
+    Memoized per process. With PM_BAKED_PROMPTS=1 the built-in defaults are
+    authoritative and the filesystem is never touched (fast cold starts for
+    short-lived eval subprocesses).
+    """
+    if os.getenv("PM_BAKED_PROMPTS") == "1":
+        return default.strip()
     path = _PROMPTS_DIR / name
     if not path.exists():
         return default.strip()
@@ -91,20 +126,39 @@ Finish with line: **Overall**: <score>
 """,
 )
 
+_JUDGE_GUIDELINES = _read_prompt_file(
+    "judge_guidelines.txt",
+    """
+You are a JUDGE. Compare the numbered CANDIDATE answers against the user's request.
+
+Score each candidate 0.00–1.00 on coverage, clarity and constraints, combined.
+Pick the best one and give 2–3 concrete improvements for it.
+
+Respond with ONLY a JSON object:
+{"scores": [<score per candidate>], "best": <candidate number>, "critique": "<improvements>"}
+""",
+)
+
 
 # -------------------------
 # Helpers
 # -------------------------
 
+_RE_OVERALL_BOLD = re.compile(r"\*\*Overall\*\*:\s*([01](?:\.\d+)?)")
+_RE_OVERALL_PLAIN = re.compile(r"\bOverall:\s*([01](?:\.\d+)?)", re.I)
+# A *completed* Overall line (newline seen), so a streamed "0." is never cut short.
+_RE_OVERALL_LINE = re.compile(r"\*\*Overall\*\*:\s*[01](?:\.\d+)?[^\n]*\n")
+
+
 def _parse_overall_score(text: str) -> Optional[float]:
     """
     Extract '**Overall**: 0.87' style score from critic output.
     Returns None if not found.
     """
-    m = re.search(r"\*\*Overall\*\*:\s*([01](?:\.\d+)?)", text)
+    m = _RE_OVERALL_BOLD.search(text)
     if not m:
         # tolerate 'Overall:' without bold
-        m = re.search(r"\bOverall:\s*([01](?:\.\d+)?)", text, flags=re.I)
+        m = _RE_OVERALL_PLAIN.search(text)
     if not m:
         return None
     try:
@@ -116,97 +170,504 @@ def _parse_overall_score(text: str) -> Optional[float]:
     return None
 
 
-def _messages_with_budget(system_prompt: str, user_text: str, max_tokens: int) -> List[Message]:
+def _parse_judge(text: str, n: int) -> Tuple[int, str]:
+    """
+    Parse the judge's JSON verdict into (0-based best index, critique).
+
+    Uses "best" (1-based) if valid, else the highest of "scores". A reply that is
+    not JSON falls back to candidate 0 with the whole reply as its critique.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    try:
+        verdict = json.loads(text[start : end + 1]) if 0 <= start < end else None
+    except ValueError:
+        verdict = None
+    if not isinstance(verdict, dict):
+        return 0, text.strip()
+
+    best = verdict.get("best")
+    scores = verdict.get("scores")
+    if isinstance(best, int) and 1 <= best <= n:
+        idx = best - 1
+    elif (
+        isinstance(scores, list)
+        and len(scores) == n
+        and all(isinstance(x, (int, float)) for x in scores)
+    ):
+        idx = max(range(n), key=lambda i: scores[i])
+    else:
+        idx = 0
+    critique = verdict.get("critique")
+    return idx, critique.strip() if isinstance(
+        critique, str
+    ) and critique.strip() else text.strip()
+
+
+# Message layout: the system message carries ONLY the static prompt text
+# (_SYSTEM_V1/_SYSTEM_V2/_CRITIC_GUIDELINES), byte-identical across calls.
+# Everything task- or pass-specific goes into later user/assistant turns so
+# provider prefix caching (OpenAI automatic, Anthropic cache_control) can hit.
+#
+# Builders take ALREADY-SANITIZED text (`*_s`): flows sanitize the task once
+# per run and each draft/critique once per pass, then reuse it everywhere.
+
+
+def _messages_with_budget(
+    system_prompt: str, user_s: str, max_tokens: int
+) -> List[Message]:
     msgs: List[Message] = [
-        {"role": "system", "content": utils.sanitize_text(system_prompt)},
-        {"role": "user", "content": utils.sanitize_text(user_text)},
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_s},
     ]
     return utils.truncate_messages(msgs, max_tokens=max_tokens, keep_system=True)
 
 
-def _critic_messages(user_text: str, candidate_text: str) -> List[Message]:
-    sys_prompt = f"{_CRITIC_GUIDELINES}\n\nYou will receive the user's request and a CANDIDATE answer."
+def _critic_messages(task_s: str, candidate_s: str) -> List[Message]:
     msgs: List[Message] = [
-        {"role": "system", "content": sys_prompt},
-        {"role": "user", "content": f"USER REQUEST:\n{utils.sanitize_text(user_text)}\n\nCANDIDATE:\n{utils.sanitize_text(candidate_text)}"},
+        {"role": "system", "content": _CRITIC_GUIDELINES},
+        {
+            "role": "user",
+            "content": (
+                "You will receive the user's request and a CANDIDATE answer.\n\n"
+                f"USER REQUEST:\n{task_s}\n\nCANDIDATE:\n{candidate_s}"
+            ),
+        },
     ]
     # Budget generously here; orchestration will clamp via adapter max_tokens.
     return utils.truncate_messages(msgs, max_tokens=2000, keep_system=True)
 
 
-def _revision_messages(system_prompt: str, user_text: str, draft: str, critique: str) -> List[Message]:
-    sys_prompt = (
-        f"{system_prompt}\n\n"
-        "Revise the answer by APPLYING the critique below.\n"
-        "Respond with ONLY the revised answer."
+def _revision_messages(
+    system_prompt: str, task_s: str, draft_s: str, critique_s: str
+) -> List[Message]:
+    msgs: List[Message] = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"USER REQUEST:\n{task_s}"},
+        {"role": "assistant", "content": f"DRAFT:\n{draft_s}"},
+        {
+            "role": "user",
+            "content": (
+                "Revise the answer by APPLYING the critique below.\n"
+                "Respond with ONLY the revised answer.\n\n"
+                f"CRITIQUE:\n{critique_s}\n\nPlease provide the REVISED answer now."
+            ),
+        },
+    ]
+    return utils.truncate_messages(msgs, max_tokens=2000, keep_system=True)
+
+
+def _judge_messages(task_s: str, candidates_s: List[str]) -> List[Message]:
+    numbered = "\n\n".join(
+        f"CANDIDATE {k}:\n{c}" for k, c in enumerate(candidates_s, 1)
     )
     msgs: List[Message] = [
-        {"role": "system", "content": sys_prompt},
-        {"role": "user", "content": f"USER REQUEST:\n{utils.sanitize_text(user_text)}"},
-        {"role": "assistant", "content": f"DRAFT:\n{utils.sanitize_text(draft)}"},
-        {"role": "user", "content": f"CRITIQUE:\n{utils.sanitize_text(critique)}\n\nPlease provide the REVISED answer now."},
+        {"role": "system", "content": _JUDGE_GUIDELINES},
+        {"role": "user", "content": f"USER REQUEST:\n{task_s}\n\n{numbered}"},
     ]
     return utils.truncate_messages(msgs, max_tokens=2000, keep_system=True)
 
 
+# Templates only: build_pass_record copies meta, so each PassRecord owns its dict.
+_META_V2: Dict[str, str] = {"mode": "v2"}
+_META_V2_SPECULATIVE: Dict[str, str] = {"mode": "v2", "speculative": "true"}
+
+# Draft temperatures for speculative fan-out (cycled when max_passes exceeds them).
+_SPECULATIVE_TEMPERATURES = (0.1, 0.3, 0.5)
+
+
+def _record(sink: Optional[BinaryIO], fields: Dict[str, object]) -> PassRecord:
+    """Build a PassRecord and, with a sink, stream it right away as one JSONL line (no flush)."""
+    record = build_pass_record(**fields)
+    if sink is not None:
+        sink.write(utils.dump_jsonl_line(record))
+    return record
+
+
+# -------------------------
+# Drivers
+# -------------------------
+#
+# Each orchestrator is written once as a "flow": a generator that yields a
+# _Call whenever it needs the model and receives the generated text back.
+# A flow may also yield a tuple of independent _Calls (fan-out) and receives
+# the list of texts back, in order. The drivers below decide HOW calls are
+# issued (blocking, awaited, or batched), so run() and arun() share the exact
+# same orchestration logic.
+
+
+@dataclass(frozen=True)
+class _Call:
+    """A single pending model call yielded by a flow."""
+
+    messages: List[Message]
+    temperature: float
+    max_tokens: int
+    timeout_seconds: int
+    # If set, the reply is streamed and cut off as soon as this pattern matches.
+    stop_at: Optional[Pattern[str]] = None
+
+
+Step = Union[_Call, Tuple[_Call, ...]]
+Flow = Generator[Step, Union[str, List[str]], RunResult]
+
+
+def _generate_until(model: LLM, call: _Call) -> str:
+    """Stream `call` and stop reading once `call.stop_at` matches the text so far."""
+    stream = model.generate_stream(
+        call.messages,
+        temperature=call.temperature,
+        max_tokens=call.max_tokens,
+        timeout_seconds=call.timeout_seconds,
+    )
+    buf = ""
+    try:
+        for chunk in stream:
+            buf += chunk
+            if call.stop_at.search(buf):
+                break
+    finally:
+        stream.close()  # aborts the provider response on early exit
+    return buf.strip()
+
+
+def _cut_at(text: str, stop_at: Optional[Pattern[str]]) -> str:
+    """Apply a call's stop pattern to an already complete reply (non-streaming paths)."""
+    m = stop_at.search(text) if stop_at is not None else None
+    return text[: m.end()].strip() if m else text
+
+
+def _generate(model: LLM, call: _Call) -> str:
+    # Duck-typed models may only implement `generate`; cut their complete reply instead.
+    if call.stop_at is not None and getattr(model, "generate_stream", None) is not None:
+        return _generate_until(model, call)
+    text = model.generate(
+        call.messages,
+        temperature=call.temperature,
+        max_tokens=call.max_tokens,
+        timeout_seconds=call.timeout_seconds,
+    )
+    return _cut_at(text, call.stop_at)
+
+
+def _drive(flow: Flow, model: LLM) -> RunResult:
+    """Run a flow to completion with blocking `model.generate` calls (fan-outs run one by one)."""
+    try:
+        step = next(flow)
+        while True:
+            try:
+                if isinstance(step, tuple):
+                    reply: Union[str, List[str]] = [
+                        _generate(model, call) for call in step
+                    ]
+                else:
+                    reply = _generate(model, step)
+            except Exception as e:
+                # Surface adapter errors inside the flow so its own handling applies.
+                step = flow.throw(e)
+            else:
+                step = flow.send(reply)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _adrive(
+    flow: Flow, model: LLM, limit: Optional[asyncio.Semaphore] = None
+) -> RunResult:
+    """
+    Async twin of `_drive`: awaits `model.agenerate` so I/O can overlap.
+
+    `limit` bounds in-flight model calls across every flow sharing it. It is held
+    per call, not per flow, so one task's critique can run while another task
+    drafts; only a flow's own draft -> critique -> revision chain is serialized.
+    The calls of a fan-out are awaited together.
+    """
+    import asyncio
+
+    # Models without `agenerate` (plain duck-typed classes) run `generate` in a worker thread.
+    agenerate = getattr(model, "agenerate", None)
+
+    async def _one(call: _Call) -> str:
+        kwargs = dict(
+            temperature=call.temperature,
+            max_tokens=call.max_tokens,
+            timeout_seconds=call.timeout_seconds,
+        )
+        async with limit or contextlib.nullcontext():
+            if agenerate is not None:
+                text = await agenerate(call.messages, **kwargs)
+            else:
+                text = await asyncio.to_thread(model.generate, call.messages, **kwargs)
+        return _cut_at(text, call.stop_at)
+
+    try:
+        step = next(flow)
+        while True:
+            try:
+                if isinstance(step, tuple):
+                    reply: Union[str, List[str]] = list(
+                        await asyncio.gather(*[_one(call) for call in step])
+                    )
+                else:
+                    reply = await _one(step)
+            except Exception as e:
+                step = flow.throw(e)
+            else:
+                step = flow.send(reply)
+    except StopIteration as stop:
+        return stop.value
+
+
+def _drive_batch(flows: List[Flow], model: LLM) -> List[RunResult]:
+    """
+    Run many independent flows in lockstep: each round collects the pending
+    call of every unfinished flow and issues them via `model.generate_batch`
+    (grouped by sampling params, which a single batch call shares). Fan-out
+    calls join the same groups; a flow resumes once all of its calls are back.
+    """
+    results: List[Optional[RunResult]] = [None] * len(flows)
+    pending: Dict[int, Step] = {}
+    # Models without `generate_batch` (plain duck-typed classes) get one `generate` per prompt.
+    generate_batch = getattr(model, "generate_batch", None)
+    if generate_batch is None:
+
+        def generate_batch(batch: List[List[Message]], **kwargs) -> List[str]:
+            return [model.generate(messages, **kwargs) for messages in batch]
+
+    def _advance(i: int, step) -> None:
+        try:
+            pending[i] = step()
+        except StopIteration as stop:
+            results[i] = stop.value
+
+    for i, flow in enumerate(flows):
+        _advance(i, flow.__next__)
+
+    while pending:
+        # Slot (flow index, position in its fan-out) -> call; single calls use position 0.
+        calls: Dict[Tuple[int, int], _Call] = {}
+        for i, step in pending.items():
+            for j, call in enumerate(step if isinstance(step, tuple) else (step,)):
+                calls[(i, j)] = call
+        groups: Dict[Tuple[float, int, int], List[Tuple[int, int]]] = {}
+        for slot, call in calls.items():
+            groups.setdefault(
+                (call.temperature, call.max_tokens, call.timeout_seconds), []
+            ).append(slot)
+
+        texts_by_slot: Dict[Tuple[int, int], str] = {}
+        errors: Dict[int, Exception] = {}
+        for (temperature, max_tokens, timeout_seconds), slots in groups.items():
+            try:
+                texts = generate_batch(
+                    [calls[slot].messages for slot in slots],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout_seconds=timeout_seconds,
+                )
+            except Exception as e:
+                for i, _ in slots:
+                    errors.setdefault(i, e)
+                continue
+            for slot, text in zip(slots, texts):
+                texts_by_slot[slot] = _cut_at(text, calls[slot].stop_at)
+
+        current, pending = pending, {}
+        for i, step in current.items():
+            if i in errors:
+                _advance(i, lambda i=i: flows[i].throw(errors[i]))
+            elif isinstance(step, tuple):
+                reply = [texts_by_slot[(i, j)] for j in range(len(step))]
+                _advance(i, lambda i=i, reply=reply: flows[i].send(reply))
+            else:
+                _advance(i, lambda i=i: flows[i].send(texts_by_slot[(i, 0)]))
+
+    return [r for r in results if r is not None]
+
+
+# Exact (model, critic prompt, task, draft) -> (critique, score) memo for deterministic
+# runs; bounded, oldest evicted first. Process-wide, so the key must pin everything
+# that shapes the critique.
+_CRITIC_MEMO: Dict[str, Tuple[str, float]] = {}
+_CRITIC_MEMO_MAX = 4096
+
+
+def _model_identity(model: LLM) -> str:
+    """Class plus model name; wrappers (e.g. CachingLLM) answer as their inner model."""
+    inner = getattr(model, "inner", None)
+    if inner is not None:
+        return _model_identity(inner)
+    cls = type(model)
+    return f"{cls.__module__}.{cls.__qualname__}:{getattr(model, 'model', '')}"
+
+
+def _critic_memo_key(model: LLM, task_s: str, draft_s: str) -> str:
+    raw = "\0".join((_model_identity(model), _CRITIC_GUIDELINES, task_s, draft_s))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _critique(
+    critic_cache: Optional[SemanticCache],
+    task_s: str,
+    draft_s: str,
+    timeout_seconds: int,
+    memo_model: Optional[LLM] = None,
+) -> Generator[_Call, str, Tuple[str, float, int]]:
+    """
+    Critic sub-flow shared by V1/V2 (use with `yield from`).
+
+    Returns (critique, overall_score, tokens_spent). Lookups before calling the model:
+    - memo_model (deterministic runs): exact hit in _CRITIC_MEMO for this model.
+    - critic_cache: a near-duplicate draft of the same task reuses the earlier critique.
+    Hits spend no tokens. Only critiques the model actually wrote are memoized.
+    """
+    memo_key = (
+        _critic_memo_key(memo_model, task_s, draft_s)
+        if memo_model is not None
+        else None
+    )
+    if memo_key is not None and memo_key in _CRITIC_MEMO:
+        critique, score = _CRITIC_MEMO[memo_key]
+        return critique, score, 0
+
+    # Embed the draft alone: a shared task would otherwise dominate the vector and
+    # make unrelated drafts look alike. The task must match exactly instead.
+    scope = hashlib.blake2b(task_s.encode("utf-8"), digest_size=16).hexdigest()
+    hit = (
+        critic_cache.lookup(draft_s, scope=scope) if critic_cache is not None else None
+    )
+    if hit is not None:
+        critique, used = hit, 0
+    else:
+        cmsgs = _critic_messages(task_s, draft_s)
+        critique = yield _Call(
+            cmsgs,
+            temperature=0.0,  # stable critic
+            max_tokens=256,
+            timeout_seconds=timeout_seconds,
+            # _CRITIC_GUIDELINES makes the score line last, so nothing after it is needed
+            stop_at=_RE_OVERALL_LINE,
+        )
+        if critic_cache is not None:
+            critic_cache.add(draft_s, critique, scope=scope)
+        used = utils.rough_messages_token_count(cmsgs) + utils.rough_token_count(
+            critique
+        )
+
+    score = _parse_overall_score(critique) or 0.0
+    if memo_key is not None and hit is None:  # never memoize a semantic-cache hit
+        if len(_CRITIC_MEMO) >= _CRITIC_MEMO_MAX:
+            del _CRITIC_MEMO[next(iter(_CRITIC_MEMO))]
+        _CRITIC_MEMO[memo_key] = (critique, score)
+    return critique, score, used
+
+
 # -------------------------
 # V1 Orchestrator
 # -------------------------
 
+
 @dataclass
 class PromptModeV1:
     model: LLM
-    config: V1Config = V1Config()
+    config: V1Config = field(default_factory=V1Config)
+    critic_cache: Optional[SemanticCache] = None
 
-    def run(self, task_text: str) -> RunResult:
-        started = utils._utc_now_iso() if hasattr(utils, "_utc_now_iso") else None  # tolerate direct run
+    def run(
+        self, task_text: str, transcript_sink: Optional[BinaryIO] = None
+    ) -> RunResult:
+        """
+        Run one task. With `transcript_sink` (a binary file), each PassRecord is
+        written as a JSONL line the moment it is produced; the caller owns the handle.
+        """
+        return _drive(self._flow(task_text, transcript_sink), self.model)
+
+    async def arun(
+        self, task_text: str, transcript_sink: Optional[BinaryIO] = None
+    ) -> RunResult:
+        """Same as `run`, but awaits `model.agenerate` (use with asyncio.gather)."""
+        return await _adrive(self._flow(task_text, transcript_sink), self.model)
+
+    def run_batch(self, task_texts: List[str]) -> List[RunResult]:
+        """Run many tasks in lockstep, batching each phase via `model.generate_batch`."""
+        return _drive_batch([self._flow(t) for t in task_texts], self.model)
+
+    async def arun_batch(
+        self, task_texts: List[str], *, max_concurrency: int = 8
+    ) -> List[RunResult]:
+        """Run many tasks concurrently with at most `max_concurrency` model calls in flight."""
+        import asyncio
+
+        limit = asyncio.Semaphore(max(1, max_concurrency))
+        return list(
+            await asyncio.gather(
+                *[_adrive(self._flow(t), self.model, limit) for t in task_texts]
+            )
+        )
+
+    def _flow(self, task_text: str, transcript_sink: Optional[BinaryIO] = None) -> Flow:
+        started = (
+            utils._utc_now_iso() if hasattr(utils, "_utc_now_iso") else None
+        )  # tolerate direct run
         passes: List[PassRecord] = []
         token_total = 0
         stopped_reason = "complete"
         error_message = None
+        task_s = utils.sanitize_text(task_text)
 
         try:
             # 1) DRAFT
-            msgs = _messages_with_budget(_SYSTEM_V1, task_text, self.config.max_input_tokens)
-            draft = self.model.generate(
+            msgs = _messages_with_budget(
+                _SYSTEM_V1, task_s, self.config.max_input_tokens
+            )
+            draft = yield _Call(
                 msgs,
                 temperature=self.config.temperature,
                 max_tokens=self.config.max_output_tokens,
                 timeout_seconds=self.config.timeout_seconds,
             )
-            token_total += utils.rough_messages_token_count(msgs) + utils.rough_token_count(draft)
+            token_total += utils.rough_messages_token_count(
+                msgs
+            ) + utils.rough_token_count(draft)
 
             # 2) CRITIQUE
-            cmsgs = _critic_messages(task_text, draft)
-            critique = self.model.generate(
-                cmsgs,
-                temperature=0.0,  # stable critic
-                max_tokens=256,
-                timeout_seconds=self.config.timeout_seconds,
+            draft_s = utils.sanitize_text(draft)
+            critique, _, used = yield from _critique(
+                self.critic_cache,
+                task_s,
+                draft_s,
+                self.config.timeout_seconds,
+                memo_model=self.model if self.config.temperature == 0.0 else None,
             )
-            token_total += utils.rough_messages_token_count(cmsgs) + utils.rough_token_count(critique)
+            token_total += used
 
             # 3) REVISION
-            rmsgs = _revision_messages(_SYSTEM_V1, task_text, draft, critique)
-            revision = self.model.generate(
+            rmsgs = _revision_messages(
+                _SYSTEM_V1, task_s, draft_s, utils.sanitize_text(critique)
+            )
+            revision = yield _Call(
                 rmsgs,
                 temperature=self.config.temperature,
                 max_tokens=self.config.max_output_tokens,
                 timeout_seconds=self.config.timeout_seconds,
             )
-            token_total += utils.rough_messages_token_count(rmsgs) + utils.rough_token_count(revision)
+            token_total += utils.rough_messages_token_count(
+                rmsgs
+            ) + utils.rough_token_count(revision)
 
-            diff = utils.diff_text(draft, revision)
+            diff = utils.diff_text(draft, revision) if self.config.record_diff else None
             passes.append(
-                PassRecord(
-                    step=1,
-                    phase="revision",
-                    draft=draft,
-                    critique=critique,
-                    revision=revision,
-                    diff=diff,
-                    token_estimate=token_total,
-                    meta={"mode": "v1"},
+                _record(
+                    transcript_sink,
+                    dict(
+                        step=1,
+                        phase="revision",
+                        draft=draft,
+                        critique=critique,
+                        revision=revision,
+                        diff=diff,
+                        token_estimate=token_total,
+                        meta={"mode": "v1"},
+                    ),
                 )
             )
 
@@ -214,16 +675,18 @@ class PromptModeV1:
         except Exception as e:
             stopped_reason = "error"
             error_message = str(e)
-            final = (passes[-1].revision if passes else "").strip() or "ERROR: " + error_message
+            final = (
+                passes[-1].revision if passes else ""
+            ).strip() or "ERROR: " + error_message
 
         finished = utils._utc_now_iso() if hasattr(utils, "_utc_now_iso") else None
 
-        return RunResult(
+        return build_run_result(
             mode="v1",
             final_output=final,
             passes=passes,
             token_count=token_total,
-            stopped_reason=stopped_reason,  # type: ignore[arg-type]
+            stopped_reason=stopped_reason,
             error_message=error_message,
             started_at=started or "",
             finished_at=finished or "",
@@ -235,129 +698,383 @@ class PromptModeV1:
 # V2 Orchestrator
 # -------------------------
 
+
 @dataclass
 class PromptModeV2:
     model: LLM
     max_passes: int = 3
-    config: V2Config = V2Config()
+    config: V2Config = field(default_factory=V2Config)
+    critic_cache: Optional[SemanticCache] = None
+    # Draft all passes at once and let one judge call pick the best (see _speculative_flow).
+    speculative: bool = False
 
-    def run(self, task_text: str) -> RunResult:
-        started = utils._utc_now_iso() if hasattr(utils, "_utc_now_iso") else None
-        passes: List[PassRecord] = []
-        token_total = 0
-        stopped_reason = "complete"
-        error_message = None
+    def run(
+        self, task_text: str, transcript_sink: Optional[BinaryIO] = None
+    ) -> RunResult:
+        """
+        Run one task. With `transcript_sink` (a binary file), each PassRecord is
+        written as a JSONL line the moment it is produced; the caller owns the handle.
+        """
+        return _drive(self._flow(task_text, transcript_sink), self.model)
+
+    async def arun(
+        self, task_text: str, transcript_sink: Optional[BinaryIO] = None
+    ) -> RunResult:
+        """Same as `run`, but awaits `model.agenerate` (use with asyncio.gather)."""
+        return await _adrive(self._flow(task_text, transcript_sink), self.model)
+
+    def run_batch(self, task_texts: List[str]) -> List[RunResult]:
+        """Run many tasks in lockstep, batching each phase via `model.generate_batch`."""
+        return _drive_batch([self._flow(t) for t in task_texts], self.model)
 
-        # plan step (lightweight, inlined to keep code small)
-        plan_msgs = _messages_with_budget(_SYSTEM_V2, f"Plan the answer as 2–4 bullet subgoals.\n\nTask:\n{task_text}", self.config.max_input_tokens)
+    async def arun_batch(
+        self, task_texts: List[str], *, max_concurrency: int = 8
+    ) -> List[RunResult]:
+        """Run many tasks concurrently with at most `max_concurrency` model calls in flight."""
+        import asyncio
+
+        limit = asyncio.Semaphore(max(1, max_concurrency))
+        return list(
+            await asyncio.gather(
+                *[_adrive(self._flow(t), self.model, limit) for t in task_texts]
+            )
+        )
+
+    def _plan(
+        self, task_s: str
+    ) -> Generator[Step, str, Tuple[str, int, Optional[str]]]:
+        """Plan sub-flow (lightweight). Returns (plan, tokens_spent, error_message)."""
+        plan_msgs = _messages_with_budget(
+            _SYSTEM_V2,
+            f"Plan the answer as 2–4 bullet subgoals.\n\nTask:\n{task_s}",
+            self.config.max_input_tokens,
+        )
         try:
-            plan = self.model.generate(
+            plan = yield _Call(
                 plan_msgs,
                 temperature=0.1,
                 max_tokens=200,
                 timeout_seconds=self.config.timeout_seconds,
             )
-            token_total += utils.rough_messages_token_count(plan_msgs) + utils.rough_token_count(plan)
         except Exception as e:
             # If planning fails, proceed without plan (still honest)
-            plan = "• Provide concise answer\n• Cover constraints\n• Include rationale\n"
-            error_message = f"plan_error: {e}"
+            return (
+                "• Provide concise answer\n• Cover constraints\n• Include rationale\n",
+                0,
+                f"plan_error: {e}",
+            )
+        return (
+            plan,
+            utils.rough_messages_token_count(plan_msgs) + utils.rough_token_count(plan),
+            None,
+        )
+
+    def _draft_messages(self, task_s: str, plan_s: str, step: int) -> List[Message]:
+        # DRAFT for one pass (keep it small and iterative)
+        draft_msgs: List[Message] = [
+            {"role": "system", "content": _SYSTEM_V2},
+            {
+                "role": "user",
+                "content": f"USER REQUEST:\n{task_s}\n\nPLAN:\n{plan_s}\n\nProvide a concise draft for pass {step}.",
+            },
+        ]
+        return utils.truncate_messages(
+            draft_msgs, max_tokens=self.config.max_input_tokens, keep_system=True
+        )
+
+    def _flow(self, task_text: str, transcript_sink: Optional[BinaryIO] = None) -> Flow:
+        if self.speculative and self.config.early_stop_score is None:
+            return self._speculative_flow(task_text, transcript_sink)
+        return self._iterative_flow(task_text, transcript_sink)
+
+    def _iterative_flow(
+        self, task_text: str, transcript_sink: Optional[BinaryIO] = None
+    ) -> Flow:
+        started = utils._utc_now_iso() if hasattr(utils, "_utc_now_iso") else None
+        n_passes = max(1, min(self.max_passes, self.config.max_passes))
+        # Preallocated slots, filled by index as each pass completes (and streamed).
+        records: List[Optional[PassRecord]] = [None] * n_passes
+        done = 0
+        token_total = 0
+        stopped_reason = "complete"
+        task_s = utils.sanitize_text(task_text)
+
+        plan, token_total, error_message = yield from self._plan(task_s)
+        plan_s = utils.sanitize_text(plan)
 
         try:
-            for step in range(1, max(1, min(self.max_passes, self.config.max_passes)) + 1):
+            for step in range(1, n_passes + 1):
                 t0 = time.time()
 
-                # DRAFT for this pass (keep it small and iterative)
-                draft_msgs: List[Message] = [
-                    {"role": "system", "content": _SYSTEM_V2},
-                    {"role": "user", "content": f"USER REQUEST:\n{utils.sanitize_text(task_text)}\n\nPLAN:\n{utils.sanitize_text(plan)}\n\nProvide a concise draft for pass {step}."},
-                ]
-                draft_msgs = utils.truncate_messages(draft_msgs, max_tokens=self.config.max_input_tokens, keep_system=True)
-
-                draft = self.model.generate(
+                draft_msgs = self._draft_messages(task_s, plan_s, step)
+                draft = yield _Call(
                     draft_msgs,
                     temperature=self.config.temperature,
                     max_tokens=self.config.max_output_tokens,
                     timeout_seconds=self.config.timeout_seconds,
                 )
-                token_total += utils.rough_messages_token_count(draft_msgs) + utils.rough_token_count(draft)
+                token_total += utils.rough_messages_token_count(
+                    draft_msgs
+                ) + utils.rough_token_count(draft)
 
                 # CRITIQUE
-                cmsgs = _critic_messages(task_text, draft)
-                critique = self.model.generate(
-                    cmsgs,
-                    temperature=0.0,
-                    max_tokens=256,
-                    timeout_seconds=self.config.timeout_seconds,
+                draft_s = utils.sanitize_text(draft)
+                critique, score, used = yield from _critique(
+                    self.critic_cache,
+                    task_s,
+                    draft_s,
+                    self.config.timeout_seconds,
+                    memo_model=self.model if self.config.temperature == 0.0 else None,
+                )
+                token_total += used
+
+                # Decide BEFORE paying for a revision whether this pass is the last.
+                budget = (
+                    self.config.max_input_tokens + self.config.max_output_tokens
+                ) * 4
+                rmsgs = _revision_messages(
+                    _SYSTEM_V2, task_s, draft_s, utils.sanitize_text(critique)
                 )
-                token_total += utils.rough_messages_token_count(cmsgs) + utils.rough_token_count(critique)
+                if self.config.early_stop_score is not None and score >= float(
+                    self.config.early_stop_score
+                ):
+                    # Critic already accepts the draft; a revision would only cost tokens.
+                    stopped_reason = "early_stop"
+                elif (
+                    token_total
+                    + utils.rough_messages_token_count(rmsgs)
+                    + self.config.max_output_tokens
+                    > budget
+                ):
+                    # The revision call would (by estimate) overrun the budget.
+                    stopped_reason = "token_budget"
+
+                if stopped_reason != "complete":
+                    records[done] = _record(
+                        transcript_sink,
+                        {
+                            "step": step,
+                            "phase": "critique",
+                            "plan": plan,
+                            "draft": draft,
+                            "critique": critique,
+                            "revision": draft,
+                            "token_estimate": token_total,
+                            "elapsed_ms": int((time.time() - t0) * 1000),
+                            "meta": _META_V2,
+                        },
+                    )
+                    done += 1
+                    break
 
                 # REVISION
-                rmsgs = _revision_messages(_SYSTEM_V2, task_text, draft, critique)
-                revision = self.model.generate(
+                revision = yield _Call(
                     rmsgs,
                     temperature=self.config.temperature,
                     max_tokens=self.config.max_output_tokens,
                     timeout_seconds=self.config.timeout_seconds,
                 )
-                token_total += utils.rough_messages_token_count(rmsgs) + utils.rough_token_count(revision)
+                token_total += utils.rough_messages_token_count(
+                    rmsgs
+                ) + utils.rough_token_count(revision)
 
-                diff = utils.diff_text(draft, revision)
+                diff = (
+                    utils.diff_text(draft, revision)
+                    if self.config.record_diff
+                    else None
+                )
                 elapsed_ms = int((time.time() - t0) * 1000)
 
-                passes.append(
-                    PassRecord(
-                        step=step,
-                        phase="revision",
-                        plan=plan,
-                        draft=draft,
-                        critique=critique,
-                        revision=revision,
-                        diff=diff,
-                        token_estimate=token_total,
-                        elapsed_ms=elapsed_ms,
-                        meta={"mode": "v2"},
-                    )
+                records[done] = _record(
+                    transcript_sink,
+                    {
+                        "step": step,
+                        "phase": "revision",
+                        "plan": plan,
+                        "draft": draft,
+                        "critique": critique,
+                        "revision": revision,
+                        "diff": diff,
+                        "token_estimate": token_total,
+                        "elapsed_ms": elapsed_ms,
+                        "meta": _META_V2,
+                    },
                 )
+                done += 1
 
-                # Early stop if critic says we're good enough
-                score = _parse_overall_score(critique) or 0.0
-                if self.config.early_stop_score is not None and score >= float(self.config.early_stop_score):
-                    stopped_reason = "early_stop"
-                    break
-
-                # Budget guard (simple heuristic)
-                if token_total >= (self.config.max_input_tokens + self.config.max_output_tokens) * 4:
+                # Budget guard (simple heuristic): no room for another pass
+                if token_total >= budget:
                     stopped_reason = "token_budget"
                     break
 
                 # Max passes guard is covered by loop bounds
 
-            final = (passes[-1].revision if passes else "").strip()
+            final = (records[done - 1].revision if done else "").strip()
             if not final:
                 # Fallback: try drafting once if something went off
-                fm = _messages_with_budget(_SYSTEM_V2, task_text, self.config.max_input_tokens)
-                final = self.model.generate(
-                    fm,
-                    temperature=self.config.temperature,
+                fm = _messages_with_budget(
+                    _SYSTEM_V2, task_s, self.config.max_input_tokens
+                )
+                final = (
+                    yield _Call(
+                        fm,
+                        temperature=self.config.temperature,
+                        max_tokens=self.config.max_output_tokens,
+                        timeout_seconds=self.config.timeout_seconds,
+                    )
+                ).strip()
+                token_total += utils.rough_messages_token_count(
+                    fm
+                ) + utils.rough_token_count(final)
+
+        except Exception as e:
+            stopped_reason = "error"
+            error_message = str(e)
+            final = (
+                records[done - 1].revision if done else ""
+            ).strip() or "ERROR: " + error_message
+
+        passes = records[:done]
+        return self._result(
+            final, passes, token_total, stopped_reason, error_message, started
+        )
+
+    def _speculative_flow(
+        self, task_text: str, transcript_sink: Optional[BinaryIO] = None
+    ) -> Flow:
+        """
+        Map-reduce variant for runs without early stop: draft all N passes in one
+        fan-out (at _SPECULATIVE_TEMPERATURES), have ONE judge call pick the best
+        candidate and critique it, then revise that candidate once. Turns N serial
+        draft/critique/revision rounds into plan + fan-out + judge + revision.
+
+        Records one "draft" pass per candidate and a final "revision" pass.
+        No per-pass budget checks: all drafts are requested up front.
+        """
+        started = utils._utc_now_iso() if hasattr(utils, "_utc_now_iso") else None
+        n_passes = max(1, min(self.max_passes, self.config.max_passes))
+        records: List[PassRecord] = []
+        stopped_reason = "complete"
+        task_s = utils.sanitize_text(task_text)
+
+        plan, token_total, error_message = yield from self._plan(task_s)
+        plan_s = utils.sanitize_text(plan)
+
+        try:
+            t0 = time.time()
+
+            # MAP: independent drafts, varied temperatures
+            draft_msgs = [
+                self._draft_messages(task_s, plan_s, step)
+                for step in range(1, n_passes + 1)
+            ]
+            drafts = yield tuple(
+                _Call(
+                    msgs,
+                    temperature=_SPECULATIVE_TEMPERATURES[
+                        k % len(_SPECULATIVE_TEMPERATURES)
+                    ],
                     max_tokens=self.config.max_output_tokens,
                     timeout_seconds=self.config.timeout_seconds,
-                ).strip()
-                token_total += utils.rough_messages_token_count(fm) + utils.rough_token_count(final)
+                )
+                for k, msgs in enumerate(draft_msgs)
+            )
+            for step, (msgs, draft) in enumerate(zip(draft_msgs, drafts), 1):
+                token_total += utils.rough_messages_token_count(
+                    msgs
+                ) + utils.rough_token_count(draft)
+                records.append(
+                    _record(
+                        transcript_sink,
+                        {
+                            "step": step,
+                            "phase": "draft",
+                            "plan": plan,
+                            "draft": draft,
+                            "revision": draft,
+                            "token_estimate": token_total,
+                            "meta": _META_V2_SPECULATIVE,
+                        },
+                    )
+                )
+
+            # REDUCE: one judge call scores every candidate
+            drafts_s = [utils.sanitize_text(d) for d in drafts]
+            jmsgs = _judge_messages(task_s, drafts_s)
+            verdict = yield _Call(
+                jmsgs,
+                temperature=0.0,  # stable judge
+                max_tokens=256,
+                timeout_seconds=self.config.timeout_seconds,
+            )
+            token_total += utils.rough_messages_token_count(
+                jmsgs
+            ) + utils.rough_token_count(verdict)
+            best, critique = _parse_judge(verdict, n_passes)
+
+            # REVISION of the winner only
+            rmsgs = _revision_messages(
+                _SYSTEM_V2, task_s, drafts_s[best], utils.sanitize_text(critique)
+            )
+            revision = yield _Call(
+                rmsgs,
+                temperature=self.config.temperature,
+                max_tokens=self.config.max_output_tokens,
+                timeout_seconds=self.config.timeout_seconds,
+            )
+            token_total += utils.rough_messages_token_count(
+                rmsgs
+            ) + utils.rough_token_count(revision)
 
+            records.append(
+                _record(
+                    transcript_sink,
+                    {
+                        "step": n_passes + 1,
+                        "phase": "revision",
+                        "plan": plan,
+                        "draft": drafts[best],
+                        "critique": critique,
+                        "revision": revision,
+                        "diff": utils.diff_text(drafts[best], revision)
+                        if self.config.record_diff
+                        else None,
+                        "token_estimate": token_total,
+                        "elapsed_ms": int((time.time() - t0) * 1000),
+                        "meta": _META_V2_SPECULATIVE,
+                    },
+                )
+            )
+            final = revision.strip() or drafts[best].strip()
         except Exception as e:
             stopped_reason = "error"
             error_message = str(e)
-            final = (passes[-1].revision if passes else "").strip() or "ERROR: " + error_message
+            final = (
+                records[-1].revision if records else ""
+            ).strip() or "ERROR: " + error_message
+
+        passes = records
+        return self._result(
+            final, passes, token_total, stopped_reason, error_message, started
+        )
 
+    def _result(
+        self,
+        final: str,
+        passes: List[PassRecord],
+        token_total: int,
+        stopped_reason: str,
+        error_message: Optional[str],
+        started: Optional[str],
+    ) -> RunResult:
         finished = utils._utc_now_iso() if hasattr(utils, "_utc_now_iso") else None
 
-        return RunResult(
+        return build_run_result(
             mode="v2",
             final_output=final,
             passes=passes,
             token_count=token_total,
-            stopped_reason=stopped_reason,  # type: ignore[arg-type]
+            stopped_reason=stopped_reason,
             error_message=error_message,
             started_at=started or "",
             finished_at=finished or "",
@@ -0,0 +1,54 @@
+# src/prompt_mode/llm/__init__.py
+"""
+LLM interface + adapters for prompt-mode-min.
+
+- LLM: minimal interface with `generate(...)`, its async twin `agenerate(...)`,
+  `generate_batch(...)` for many independent prompts at once, and
+  `generate_stream(...)` which yields text chunks as they arrive (base.py).
+- LocalMock: deterministic, offline responses for tests/demos (mock.py).
+- OpenAIAdapter: optional; disabled in CI and when NO_NETWORK/PM_FORCE_MOCK is set.
+- AnthropicAdapter: optional; same guards, marks the system prompt for prefix caching.
+- CachingLLM: exact-match response cache around any LLM (see cache.py).
+
+Design goals:
+- Keep imports tiny and dependency-light: the adapters and CachingLLM load on
+  first attribute access, so `--mock` runs never pay for them.
+- Fail LOUDLY if a real network/model is attempted in CI.
+- Provide enough deterministic behavior to prove orchestration logic.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+from .base import LLM, Message
+from .mock import LocalMock
+
+if TYPE_CHECKING:
+    from .anthropic_adapter import AnthropicAdapter
+    from .caching import CachingLLM
+    from .openai_adapter import OpenAIAdapter
+
+__all__ = [
+    "LLM",
+    "Message",
+    "LocalMock",
+    "OpenAIAdapter",
+    "AnthropicAdapter",
+    "CachingLLM",
+]
+
+_LAZY = {
+    "OpenAIAdapter": ".openai_adapter",
+    "AnthropicAdapter": ".anthropic_adapter",
+    "CachingLLM": ".caching",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
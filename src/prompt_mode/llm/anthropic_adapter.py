@@ -0,0 +1,146 @@
+# src/prompt_mode/llm/anthropic_adapter.py
+"""
+AnthropicAdapter: optional Messages backend (local sanity checks only).
+
+The `anthropic` SDK is imported when the adapter is constructed, never at module import.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .base import LLM, Message
+
+# -------------------------
+# AnthropicAdapter (optional, local-only)
+# -------------------------
+
+
+@dataclass
+class AnthropicAdapter(LLM):
+    """
+    Thin wrapper around Anthropic Messages.
+
+    - Same NO_NETWORK / PM_FORCE_MOCK guards as OpenAIAdapter.
+    - Sends the (static) system prompt with cache_control so repeated passes
+      reuse the cached prefix; `last_usage` exposes cache_read_input_tokens
+      for verification.
+    """
+
+    api_key: str
+    model: str = "claude-3-5-haiku-latest"
+    _client: Optional[object] = None  # lazy
+    _aclient: Optional[object] = None  # lazy
+    last_usage: Optional[Dict[str, int]] = None
+
+    def __post_init__(self):
+        if os.getenv("NO_NETWORK") == "1" or os.getenv("PM_FORCE_MOCK") == "1":
+            raise RuntimeError(
+                "Network use disabled by NO_NETWORK/PM_FORCE_MOCK. Use LocalMock."
+            )
+        try:
+            from anthropic import Anthropic, AsyncAnthropic  # type: ignore
+        except Exception as e:
+            raise RuntimeError(
+                "The 'anthropic' package is required for AnthropicAdapter. "
+                "Install it locally (not in CI) and try again."
+            ) from e
+        self._client = Anthropic(api_key=self.api_key)
+        self._aclient = AsyncAnthropic(api_key=self.api_key)
+
+    @staticmethod
+    def _split(messages: List[Message]):
+        """Anthropic takes system text separately; mark it as a cacheable prefix."""
+        system_text = "\n\n".join(
+            m.get("content", "") for m in messages if m.get("role") == "system"
+        )
+        system = (
+            [
+                {
+                    "type": "text",
+                    "text": system_text,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
+            if system_text
+            else []
+        )
+        turns = [
+            {"role": m.get("role", "user"), "content": m.get("content", "")}
+            for m in messages
+            if m.get("role") != "system"
+        ]
+        return system, turns
+
+    def generate(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> str:
+        if self._client is None:
+            self.__post_init__()
+
+        system, turns = self._split(messages)
+        try:
+            resp = self._client.messages.create(
+                model=self.model,
+                system=system,
+                messages=turns,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=timeout_seconds,
+            )
+        except Exception as e:
+            raise RuntimeError(f"AnthropicAdapter call failed: {e}") from e
+
+        return self._extract_text(resp)
+
+    async def agenerate(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> str:
+        if self._aclient is None:
+            self.__post_init__()
+
+        system, turns = self._split(messages)
+        try:
+            resp = await self._aclient.messages.create(
+                model=self.model,
+                system=system,
+                messages=turns,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=timeout_seconds,
+            )
+        except Exception as e:
+            raise RuntimeError(f"AnthropicAdapter call failed: {e}") from e
+
+        return self._extract_text(resp)
+
+    def _extract_text(self, resp: object) -> str:
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            self.last_usage = {
+                k: int(getattr(usage, k, 0) or 0)
+                for k in (
+                    "input_tokens",
+                    "output_tokens",
+                    "cache_creation_input_tokens",
+                    "cache_read_input_tokens",
+                )
+            }
+        text = "".join(
+            getattr(block, "text", "") for block in getattr(resp, "content", None) or []
+        )
+        if not text.strip():
+            raise RuntimeError("AnthropicAdapter returned empty content.")
+        return text.strip()
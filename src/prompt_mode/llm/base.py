@@ -0,0 +1,140 @@
+# src/prompt_mode/llm/base.py
+"""
+LLM interface shared by every backend.
+
+- LLM: Protocol with `generate(...)`, `agenerate(...)`, `generate_batch(...)`
+  and `generate_stream(...)`; the async/batch/stream variants have defaults.
+- Message: one chat message ({"role": ..., "content": ...}).
+- Retry helpers used by network adapters (full-jitter exponential backoff).
+
+Stdlib only: importing this must stay cheap.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from typing import Awaitable, Callable, Dict, Iterator, List, Protocol, Tuple, TypeVar
+
+Message = Dict[str, str]  # {"role": "...", "content": "..."}
+T = TypeVar("T")
+
+
+class LLM(Protocol):
+    def generate(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> str:
+        """
+        Return the assistant's text for the given chat messages.
+        Must NOT mutate `messages`.
+        """
+        ...
+
+    async def agenerate(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> str:
+        """
+        Async variant of `generate`. The default runs `generate` in a worker
+        thread so sync-only adapters still overlap under asyncio.gather.
+        """
+        import asyncio
+
+        return await asyncio.to_thread(
+            self.generate,
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout_seconds=timeout_seconds,
+        )
+
+    def generate_batch(
+        self,
+        batch: List[List[Message]],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> List[str]:
+        """
+        Generate one reply per message list, in order. The default just loops;
+        adapters with cheaper bulk paths should override it.
+        """
+        return [
+            self.generate(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout_seconds=timeout_seconds,
+            )
+            for messages in batch
+        ]
+
+    def generate_stream(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> Iterator[str]:
+        """
+        Yield the reply in chunks as they arrive. Callers may stop iterating
+        (and close the generator) early; adapters should then abort the request.
+        The default yields the full `generate` result as a single chunk.
+        """
+        yield self.generate(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout_seconds=timeout_seconds,
+        )
+
+
+# -------------------------
+# Retry helpers
+# -------------------------
+
+
+def _backoff_delay(attempt: int, multiplier: float = 0.2, cap: float = 4.0) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, multiplier * 2**attempt)) seconds."""
+    return random.uniform(0.0, min(cap, multiplier * (2**attempt)))
+
+
+def _call_with_retries(
+    fn: Callable[[], T], *, retry_on: Tuple[type, ...], attempts: int = 3
+) -> T:
+    """Call `fn`, retrying `retry_on` errors with jittered backoff; other errors raise at once."""
+    for attempt in range(max(1, attempts)):
+        try:
+            return fn()
+        except retry_on:
+            if attempt + 1 >= attempts:
+                raise
+            time.sleep(_backoff_delay(attempt))
+    raise AssertionError("unreachable")
+
+
+async def _acall_with_retries(
+    fn: Callable[[], Awaitable[T]], *, retry_on: Tuple[type, ...], attempts: int = 3
+) -> T:
+    """Async twin of `_call_with_retries`; `fn` must build a fresh awaitable per attempt."""
+    import asyncio
+
+    for attempt in range(max(1, attempts)):
+        try:
+            return await fn()
+        except retry_on:
+            if attempt + 1 >= attempts:
+                raise
+            await asyncio.sleep(_backoff_delay(attempt))
+    raise AssertionError("unreachable")
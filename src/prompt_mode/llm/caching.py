@@ -0,0 +1,114 @@
+# src/prompt_mode/llm/caching.py
+"""
+CachingLLM: exact-match response cache around any LLM (see cache.py).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional
+
+from .base import LLM, Message
+
+if TYPE_CHECKING:
+    from ..cache import ResponseCache
+
+
+# -------------------------
+# CachingLLM (exact-match response cache)
+# -------------------------
+
+
+@dataclass
+class CachingLLM(LLM):
+    """
+    Wrap any LLM with an exact-match cache.
+
+    - Key: sha256 over model name + messages + temperature + max_tokens.
+    - Only near-deterministic calls are cached (temperature <= max_cache_temperature);
+      replaying a high-temperature sample would silently remove its variety.
+    """
+
+    inner: LLM
+    cache: "ResponseCache"
+    ttl_seconds: Optional[int] = None
+    max_cache_temperature: float = 0.3
+
+    def _key(self, messages: List[Message], temperature: float, max_tokens: int) -> str:
+        payload = {
+            "m": getattr(self.inner, "model", type(self.inner).__name__),
+            "msgs": messages,
+            "t": temperature,
+            "mt": max_tokens,
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def generate(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> str:
+        if temperature > self.max_cache_temperature:
+            return self.inner.generate(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout_seconds=timeout_seconds,
+            )
+
+        key = self._key(messages, temperature, max_tokens)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return hit
+        text = self.inner.generate(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout_seconds=timeout_seconds,
+        )
+        self.cache.set(key, text, self.ttl_seconds)
+        return text
+
+    async def agenerate(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> str:
+        if temperature > self.max_cache_temperature:
+            return await self._inner_agenerate(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout_seconds=timeout_seconds,
+            )
+
+        key = self._key(messages, temperature, max_tokens)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return hit
+        text = await self._inner_agenerate(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout_seconds=timeout_seconds,
+        )
+        self.cache.set(key, text, self.ttl_seconds)
+        return text
+
+    async def _inner_agenerate(self, messages: List[Message], **kwargs) -> str:
+        # Duck-typed inner models may only implement `generate`; run it in a worker thread.
+        agenerate = getattr(self.inner, "agenerate", None)
+        if agenerate is not None:
+            return await agenerate(messages, **kwargs)
+        import asyncio
+
+        return await asyncio.to_thread(self.inner.generate, messages, **kwargs)
@@ -1,45 +1,19 @@
-# src/prompt_mode/llm.py
+# src/prompt_mode/llm/mock.py
 """
-LLM interface + adapters for prompt-mode-min.
+LocalMock: deterministic, offline LLM for tests/demos.
 
-- LLM: minimal interface with a single `generate(...)` method.
-- LocalMock: deterministic, offline responses for tests/demos.
-- OpenAIAdapter: optional; disabled in CI and when NO_NETWORK/PM_FORCE_MOCK is set.
-
-Design goals:
-- Keep this file tiny and dependency-light.
-- Fail LOUDLY if a real network/model is attempted in CI.
-- Provide enough deterministic behavior to prove orchestration logic.
+Kept apart from the network adapters so `--mock` runs never import an SDK.
 """
 
 from __future__ import annotations
 
 import hashlib
-import os
 import re
 import time
-from dataclasses import dataclass
-from typing import List, Dict, Protocol, Optional
-
-
-Message = Dict[str, str]  # {"role": "...", "content": "..."}
-
-
-class LLM(Protocol):
-    def generate(
-        self,
-        messages: List[Message],
-        *,
-        temperature: float = 0.2,
-        max_tokens: int = 512,
-        timeout_seconds: int = 30,
-    ) -> str:
-        """
-        Return the assistant's text for the given chat messages.
-        Must NOT mutate `messages`.
-        """
-        ...
+from dataclasses import dataclass, field
+from typing import Iterator, List
 
+from .base import LLM, Message
 
 # -------------------------
 # Helpers
@@ -57,9 +31,31 @@ _EMAIL_HINTS = ("email", "tone", "polite", "professional")
 _SQL_HINTS = ("select", "join", "where", "group by", "sql", "query")
 _BUG_HINTS = ("bug", "issue", "stack trace", "exception", "repro", "steps to reproduce")
 
+_RE_SELECT_STAR = re.compile(r"select\s+\*", re.I)
+_RE_JOIN = re.compile(r"\bjoin\b", re.I)
+
+_SQL_TAIL = (
+    "\n\nSuggested Query:\n```sql\n"
+    "SELECT u.id, u.email, COUNT(o.id) AS orders\n"
+    "FROM users u\n"
+    "LEFT JOIN orders o ON o.user_id = u.id\n"
+    "WHERE u.created_at >= DATE '2024-01-01'\n"
+    "GROUP BY u.id, u.email\n"
+    "ORDER BY orders DESC;\n"
+    "```\nRationale:\n"
+    "- Projects specific columns for readability/perf.\n"
+    "- LEFT JOIN with explicit ON prevents unintended row explosion.\n"
+    "- WHERE bound keeps scans reasonable; GROUP BY matches projections.\n"
+)
+
+_H = hashlib.sha256
+_U64_MAX = float(2**64 - 1)
+
 
 def _is_critic_mode(messages: List[Message]) -> bool:
-    text = " ".join(m.get("content", "") for m in messages if m.get("role") == "system").lower()
+    text = " ".join(
+        m.get("content", "") for m in messages if m.get("role") == "system"
+    ).lower()
     return any(h in text for h in _CRITIC_HINTS)
 
 
@@ -75,9 +71,9 @@ def _hash_ratio(text: str, lo: float = 0.6, hi: float = 0.95) -> float:
     Map text -> deterministic float in [lo, hi].
     Used to make the mock's scores look "varied" but reproducible.
     """
-    h = hashlib.sha256(text.encode("utf-8")).digest()
-    n = int.from_bytes(h[:8], "big") / float(2**64 - 1)
-    return lo + (hi - lo) * n
+    return lo + (hi - lo) * (
+        int.from_bytes(_H(text.encode("utf-8")).digest()[:8], "big") / _U64_MAX
+    )
 
 
 def _truncate_paragraphs(text: str, max_chars: int) -> str:
@@ -90,13 +86,15 @@ def _truncate_paragraphs(text: str, max_chars: int) -> str:
 # LocalMock (deterministic, offline)
 # -------------------------
 
+
 @dataclass
 class LocalMock(LLM):
     """
     Deterministic, domain-aware offline mock.
 
     Behaviors:
-    - If system prompt looks like a CRITIC, returns a critique with 3 bullets + scores.
+    - If system prompt looks like a CRITIC, returns a critique with 3 bullets + scores,
+      improvements, and the **Overall** line last (the critic prompt's contract).
     - Else produces a revision/answer in one of a few templates:
         * Email/tone: rewrites with concise, professional tone.
         * SQL: flags naive patterns and suggests a corrected query + rationale.
@@ -107,6 +105,45 @@ class LocalMock(LLM):
     """
 
     tag: str = "[MOCK]"
+    # Fixed templates, built once from `tag` (only the SQL findings vary per call)
+    _email_out: str = field(default="", init=False, repr=False)
+    _bug_out: str = field(default="", init=False, repr=False)
+    _generic_out: str = field(default="", init=False, repr=False)
+    _sql_head: str = field(default="", init=False, repr=False)
+
+    def __post_init__(self):
+        self._email_out = (
+            f"{self.tag} Revised Email (concise, professional):\n\n"
+            "Subject: Follow-up on your request\n\n"
+            "Hi [Name],\n\n"
+            "Thanks for the update. Here’s the plan:\n"
+            "• I’ll review the document and confirm next steps by EOD tomorrow.\n"
+            "• If priorities changed, let me know and I’ll adjust.\n\n"
+            "Best,\n"
+            "[Your Name]\n"
+        )
+        self._bug_out = (
+            f"{self.tag} Bug Report Summary\n"
+            "Likely Cause:\n- Null or unexpected type in input when parsing response.\n\n"
+            "Impact:\n- Request fails intermittently; users see 500.\n\n"
+            "Repro Steps:\n"
+            "1) Start the service locally.\n"
+            "2) Send a request with a missing optional field.\n"
+            "3) Observe stack trace in logs.\n\n"
+            "Fix:\n- Add input validation and default handling before parsing.\n"
+            "- Extend test to include missing/None field case.\n"
+        )
+        self._generic_out = (
+            f"{self.tag} Revised:\n"
+            "- Leads with the answer in 1–2 lines.\n"
+            "- Breaks supporting points into bullets.\n"
+            "- Ends with next steps or a clear takeaway.\n\n"
+            "Answer:\n"
+            "1) Main point stated up front.\n"
+            "2) Key details with minimal filler.\n"
+            "3) Close with action or summary.\n"
+        )
+        self._sql_head = f"{self.tag} SQL Review\nFindings:"
 
     def generate(
         self,
@@ -118,7 +155,47 @@ class LocalMock(LLM):
     ) -> str:
         # Simulate small, bounded latency to catch accidental timeouts
         time.sleep(min(0.02, timeout_seconds / 1000.0))
+        return self._respond(messages, max_tokens)
+
+    async def agenerate(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> str:
+        import asyncio
+
+        # Same latency, but yields to the event loop so concurrent runs overlap
+        await asyncio.sleep(min(0.02, timeout_seconds / 1000.0))
+        return self._respond(messages, max_tokens)
+
+    def generate_batch(
+        self,
+        batch: List[List[Message]],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> List[str]:
+        # One simulated round-trip for the whole batch, like a real batched request
+        time.sleep(min(0.02, timeout_seconds / 1000.0))
+        return [self._respond(messages, max_tokens) for messages in batch]
+
+    def generate_stream(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> Iterator[str]:
+        # Line-sized chunks are enough to exercise early termination in core
+        time.sleep(min(0.02, timeout_seconds / 1000.0))
+        yield from self._respond(messages, max_tokens).splitlines(keepends=True)
 
+    def _respond(self, messages: List[Message], max_tokens: int) -> str:
         # Determine mode
         critic_mode = _is_critic_mode(messages)
         user = _last_user_text(messages)
@@ -151,153 +228,42 @@ class LocalMock(LLM):
             f"- Coverage: {coverage:.2f} — Does it answer the full ask?\n"
             f"- Clarity: {clarity:.2f} — Is the structure concise and readable?\n"
             f"- Constraints: {constraints:.2f} — Adheres to explicit constraints?\n"
-            f"**Overall**: {total:.2f}\n"
             f"Improvements:\n"
             f"1) Tighten wording; remove filler.\n"
             f"2) Ensure all constraints are addressed explicitly.\n"
             f"3) Add a short rationale before the final.\n"
+            f"**Overall**: {total:.2f}\n"  # last, as the critic prompt requires
         )
         return _truncate_paragraphs(out, max_tokens * 4)
 
     # ----- Email/Tone -----
 
     def _make_email_revision(self, user_text: str, max_tokens: int) -> str:
-        out = (
-            f"{self.tag} Revised Email (concise, professional):\n\n"
-            "Subject: Follow-up on your request\n\n"
-            "Hi [Name],\n\n"
-            "Thanks for the update. Here’s the plan:\n"
-            "• I’ll review the document and confirm next steps by EOD tomorrow.\n"
-            "• If priorities changed, let me know and I’ll adjust.\n\n"
-            "Best,\n"
-            "[Your Name]\n"
-        )
-        return _truncate_paragraphs(out, max_tokens * 4)
+        return _truncate_paragraphs(self._email_out, max_tokens * 4)
 
     # ----- SQL Review -----
 
     def _make_sql_review(self, user_text: str, max_tokens: int) -> str:
         # Cheap heuristics for "risky" patterns
         flags = []
-        if re.search(r"select\s+\*", user_text, flags=re.I):
+        if _RE_SELECT_STAR.search(user_text):
             flags.append("Avoid SELECT *; project only required columns.")
-        if re.search(r"\bjoin\b", user_text, flags=re.I) and "on" not in user_text.lower():
+        if _RE_JOIN.search(user_text) and "on" not in user_text.lower():
             flags.append("JOIN without ON clause risks a Cartesian product.")
 
-        fix_query = (
-            "SELECT u.id, u.email, COUNT(o.id) AS orders\n"
-            "FROM users u\n"
-            "LEFT JOIN orders o ON o.user_id = u.id\n"
-            "WHERE u.created_at >= DATE '2024-01-01'\n"
-            "GROUP BY u.id, u.email\n"
-            "ORDER BY orders DESC;"
-        )
-
-        out = f"{self.tag} SQL Review\nFindings:\n"
-        out += "\n".join(f"- {f}" for f in (flags or ["No obvious structural issues found."]))
-        out += (
-            "\n\nSuggested Query:\n```sql\n"
-            f"{fix_query}\n"
-            "```\nRationale:\n"
-            "- Projects specific columns for readability/perf.\n"
-            "- LEFT JOIN with explicit ON prevents unintended row explosion.\n"
-            "- WHERE bound keeps scans reasonable; GROUP BY matches projections.\n"
+        parts = [self._sql_head]
+        parts.extend(
+            f"- {f}" for f in (flags or ["No obvious structural issues found."])
         )
+        out = "\n".join(parts) + _SQL_TAIL
         return _truncate_paragraphs(out, max_tokens * 4)
 
     # ----- Bug Summary -----
 
     def _make_bug_summary(self, user_text: str, max_tokens: int) -> str:
-        out = (
-            f"{self.tag} Bug Report Summary\n"
-            "Likely Cause:\n- Null or unexpected type in input when parsing response.\n\n"
-            "Impact:\n- Request fails intermittently; users see 500.\n\n"
-            "Repro Steps:\n"
-            "1) Start the service locally.\n"
-            "2) Send a request with a missing optional field.\n"
-            "3) Observe stack trace in logs.\n\n"
-            "Fix:\n- Add input validation and default handling before parsing.\n"
-            "- Extend test to include missing/None field case.\n"
-        )
-        return _truncate_paragraphs(out, max_tokens * 4)
+        return _truncate_paragraphs(self._bug_out, max_tokens * 4)
 
     # ----- Generic -----
 
     def _make_generic_revision(self, user_text: str, max_tokens: int) -> str:
-        out = (
-            f"{self.tag} Revised:\n"
-            "- Leads with the answer in 1–2 lines.\n"
-            "- Breaks supporting points into bullets.\n"
-            "- Ends with next steps or a clear takeaway.\n\n"
-            "Answer:\n"
-            "1) Main point stated up front.\n"
-            "2) Key details with minimal filler.\n"
-            "3) Close with action or summary.\n"
-        )
-        return _truncate_paragraphs(out, max_tokens * 4)
-
-
-# -------------------------
-# OpenAIAdapter (optional, local-only)
-# -------------------------
-
-@dataclass
-class OpenAIAdapter(LLM):
-    """
-    Thin wrapper around OpenAI Chat Completions.
-
-    - Respects NO_NETWORK / PM_FORCE_MOCK by refusing to initialize.
-    - Requires `openai` package (new-style client). If not installed, raises.
-    - Keep defaults conservative; this is for local sanity checks only.
-    """
-
-    api_key: str
-    model: str = "gpt-4o-mini"
-    _client: Optional[object] = None  # lazy
-
-    def __post_init__(self):
-        # CI / offline guards
-        if os.getenv("NO_NETWORK") == "1" or os.getenv("PM_FORCE_MOCK") == "1":
-            raise RuntimeError("Network use disabled by NO_NETWORK/PM_FORCE_MOCK. Use LocalMock.")
-        try:
-            from openai import OpenAI  # type: ignore
-        except Exception as e:
-            raise RuntimeError(
-                "The 'openai' package is required for OpenAIAdapter. "
-                "Install it locally (not in CI) and try again."
-            ) from e
-        self._client = OpenAI(api_key=self.api_key)
-
-    def generate(
-        self,
-        messages: List[Message],
-        *,
-        temperature: float = 0.2,
-        max_tokens: int = 512,
-        timeout_seconds: int = 30,
-    ) -> str:
-        if self._client is None:
-            self.__post_init__()
-
-        # Safety: shallow copy to avoid mutation-by-reference
-        msgs = [{"role": m.get("role", "user"), "content": m.get("content", "")} for m in messages]
-
-        # Timeout is best-effort; the SDK may not support per-call timeouts directly.
-        # Keep it simple; this is for local experiments only.
-        try:
-            resp = self._client.chat.completions.create(
-                model=self.model,
-                messages=msgs,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-        except Exception as e:
-            raise RuntimeError(f"OpenAIAdapter call failed: {e}") from e
-
-        choice = getattr(resp, "choices", [None])[0]
-        if not choice or not getattr(choice, "message", None):
-            raise RuntimeError("OpenAIAdapter returned no choices/message.")
-        text = getattr(choice.message, "content", "") or ""
-        if not text.strip():
-            raise RuntimeError("OpenAIAdapter returned empty content.")
-        return text.strip()
+        return _truncate_paragraphs(self._generic_out, max_tokens * 4)
@@ -0,0 +1,184 @@
+# src/prompt_mode/llm/openai_adapter.py
+"""
+OpenAIAdapter: optional Chat Completions backend (local sanity checks only).
+
+The `openai` SDK is imported when the adapter is constructed, never at module import.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from .base import LLM, Message, _acall_with_retries, _call_with_retries
+
+# -------------------------
+# OpenAIAdapter (optional, local-only)
+# -------------------------
+
+
+@dataclass
+class OpenAIAdapter(LLM):
+    """
+    Thin wrapper around OpenAI Chat Completions.
+
+    - Respects NO_NETWORK / PM_FORCE_MOCK by refusing to initialize.
+    - Requires `openai` package (new-style client). If not installed, raises.
+    - Keep defaults conservative; this is for local sanity checks only.
+    - Fails fast: each attempt is capped at `timeout_seconds` with SDK retries
+      off; rate limits/timeouts are retried here with jittered backoff, up to
+      `max_attempts` total.
+    """
+
+    api_key: str
+    model: str = "gpt-4o-mini"
+    max_attempts: int = 3
+    _client: Optional[object] = None  # lazy
+    _aclient: Optional[object] = None  # lazy
+    _retryable: Tuple[type, ...] = ()
+
+    def __post_init__(self):
+        # CI / offline guards
+        if os.getenv("NO_NETWORK") == "1" or os.getenv("PM_FORCE_MOCK") == "1":
+            raise RuntimeError(
+                "Network use disabled by NO_NETWORK/PM_FORCE_MOCK. Use LocalMock."
+            )
+        try:
+            from openai import APITimeoutError, AsyncOpenAI, OpenAI, RateLimitError  # type: ignore
+        except Exception as e:
+            raise RuntimeError(
+                "The 'openai' package is required for OpenAIAdapter. "
+                "Install it locally (not in CI) and try again."
+            ) from e
+        self._client = OpenAI(api_key=self.api_key)
+        self._aclient = AsyncOpenAI(api_key=self.api_key)
+        self._retryable = (RateLimitError, APITimeoutError)
+
+    def generate(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> str:
+        if self._client is None:
+            self.__post_init__()
+
+        # Safety: shallow copy to avoid mutation-by-reference
+        msgs = [
+            {"role": m.get("role", "user"), "content": m.get("content", "")}
+            for m in messages
+        ]
+        client = self._client.with_options(timeout=timeout_seconds, max_retries=0)
+
+        try:
+            resp = _call_with_retries(
+                lambda: client.chat.completions.create(
+                    model=self.model,
+                    messages=msgs,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                ),
+                retry_on=self._retryable,
+                attempts=self.max_attempts,
+            )
+        except Exception as e:
+            raise RuntimeError(f"OpenAIAdapter call failed: {e}") from e
+
+        return self._extract_text(resp)
+
+    def generate_stream(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> Iterator[str]:
+        if self._client is None:
+            self.__post_init__()
+
+        msgs = [
+            {"role": m.get("role", "user"), "content": m.get("content", "")}
+            for m in messages
+        ]
+        client = self._client.with_options(timeout=timeout_seconds, max_retries=0)
+
+        # Only opening the stream is retried; once chunks flow, errors propagate.
+        try:
+            stream = _call_with_retries(
+                lambda: client.chat.completions.create(
+                    model=self.model,
+                    messages=msgs,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                ),
+                retry_on=self._retryable,
+                attempts=self.max_attempts,
+            )
+        except Exception as e:
+            raise RuntimeError(f"OpenAIAdapter call failed: {e}") from e
+
+        try:
+            for chunk in stream:
+                choices = getattr(chunk, "choices", None)
+                if not choices:
+                    continue
+                text = getattr(choices[0].delta, "content", None)
+                if text:
+                    yield text
+        finally:
+            # Runs on normal exhaustion AND when the caller stops early:
+            # closing the stream aborts the HTTP response, so no more tokens are billed.
+            stream.close()
+
+    async def agenerate(
+        self,
+        messages: List[Message],
+        *,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout_seconds: int = 30,
+    ) -> str:
+        if self._aclient is None:
+            self.__post_init__()
+
+        msgs = [
+            {"role": m.get("role", "user"), "content": m.get("content", "")}
+            for m in messages
+        ]
+        client = self._aclient.with_options(timeout=timeout_seconds, max_retries=0)
+
+        try:
+            resp = await _acall_with_retries(
+                # wait_for is a hard wall-clock cap on top of the SDK's own timeout
+                lambda: asyncio.wait_for(
+                    client.chat.completions.create(
+                        model=self.model,
+                        messages=msgs,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                    ),
+                    timeout=timeout_seconds,
+                ),
+                retry_on=self._retryable + (asyncio.TimeoutError,),
+                attempts=self.max_attempts,
+            )
+        except Exception as e:
+            raise RuntimeError(f"OpenAIAdapter call failed: {e}") from e
+
+        return self._extract_text(resp)
+
+    @staticmethod
+    def _extract_text(resp: object) -> str:
+        choice = getattr(resp, "choices", [None])[0]
+        if not choice or not getattr(choice, "message", None):
+            raise RuntimeError("OpenAIAdapter returned no choices/message.")
+        text = getattr(choice.message, "content", "") or ""
+        if not text.strip():
+            raise RuntimeError("OpenAIAdapter returned empty content.")
+        return text.strip()
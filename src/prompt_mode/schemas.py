@@ -8,27 +8,46 @@ These models are:
 - Small and readable in one sitting.
 
 Used by:
-- core.py (to build PassRecord + RunResult artifacts)
-- cli.py (to serialize transcripts)
+- core.py (to build PassRecord + RunResult artifacts via the trusted builders)
+- cli.py (to serialize transcripts; load_pass_records reads them back)
 - evals/run_eval.py (to store tiny rubric scores)
 """
 
 from __future__ import annotations
 
+import time
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Literal
+from typing import Annotated, Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, TypeAdapter
 
+from . import utils
 
 # -------------------------
 # Common utilities
 # -------------------------
 
 
+# [millisecond bucket, formatted timestamp]; records built in the same ms share the string.
+_TS_CACHE: List[Any] = [-1, ""]
+
+
 def _utc_now_iso() -> str:
-    """Return current UTC timestamp as ISO8601 string with 'Z'."""
-    return datetime.now(tz=timezone.utc).isoformat().replace("+00:00", "Z")
+    """Return current UTC timestamp as ISO8601 string (millisecond precision) with 'Z'."""
+    now = time.time()
+    ms = int(now * 1000)
+    if ms != _TS_CACHE[0]:
+        stamp = datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat(
+            timespec="milliseconds"
+        )
+        _TS_CACHE[:] = [ms, stamp.replace("+00:00", "Z")]
+    return _TS_CACHE[1]
+
+
+# Declarative constraints run inside pydantic-core (no Python validator callbacks).
+StrippedStr = Annotated[str, StringConstraints(strip_whitespace=True)]
+NonEmptyStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+UnitFloat = Annotated[float, Field(ge=0.0, le=1.0)]
 
 
 # -------------------------
@@ -56,15 +75,21 @@ class BaseConfig(BaseModel):
     timeout_seconds: int = Field(
         default=30, ge=1, description="Fail fast. Keep demos snappy."
     )
+    record_diff: bool = Field(
+        default=False,
+        description="Store draft->revision diffs on each pass (evals); else compute on demand.",
+    )
 
 
 class V1Config(BaseConfig):
     """Single self-critique + revision."""
+
     # Nothing extra for V1 (deliberately simple).
 
 
 class V2Config(BaseConfig):
     """Planner + multi-pass critique/revision."""
+
     max_passes: int = Field(
         default=3, ge=1, description="Upper bound on improvement iterations."
     )
@@ -91,7 +116,8 @@ class PassRecord(BaseModel):
       - draft: candidate text *before* critique
       - critique: feedback text from critic prompt (or heuristic)
       - revision: candidate text *after* applying critique
-      - diff: unified diff between draft and revision (utils.diff_text)
+      - diff: unified diff between draft and revision (utils.diff_text);
+              None unless config.record_diff — use compute_diff() to get it lazily
       - token_estimate: coarse count for budgeting
       - elapsed_ms: wall time for this pass (set by core; optional)
       - meta: lightweight metadata bag
@@ -103,10 +129,10 @@ class PassRecord(BaseModel):
     phase: Literal["draft", "critique", "revision", "finalize"] = "revision"
 
     plan: Optional[str] = None
-    draft: str
+    draft: StrippedStr
     critique: Optional[str] = None
-    revision: str
-    diff: str = ""
+    revision: StrippedStr
+    diff: Optional[str] = None
 
     token_estimate: int = Field(ge=0, default=0)
     elapsed_ms: Optional[int] = Field(default=None, ge=0)
@@ -114,10 +140,11 @@ class PassRecord(BaseModel):
     created_at: str = Field(default_factory=_utc_now_iso)
     meta: Dict[str, str] = Field(default_factory=dict)
 
-    @field_validator("draft", "revision")
-    @classmethod
-    def _strip_spaces(cls, v: str) -> str:
-        return v.strip()
+    def compute_diff(self) -> str:
+        """Return the draft->revision diff, computing and storing it on first use."""
+        if self.diff is None:
+            self.diff = utils.diff_text(self.draft, self.revision)
+        return self.diff
 
 
 # -------------------------
@@ -140,7 +167,7 @@ class RunResult(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
     mode: Literal["v1", "v2"]
-    final_output: str
+    final_output: NonEmptyStr
     passes: List[PassRecord] = Field(default_factory=list)
     token_count: int = Field(ge=0, default=0)
 
@@ -156,13 +183,62 @@ class RunResult(BaseModel):
     config_snapshot: Dict[str, object] = Field(default_factory=dict)
     meta: Dict[str, str] = Field(default_factory=dict)
 
-    @field_validator("final_output")
-    @classmethod
-    def _nonempty(cls, v: str) -> str:
-        v = v.strip()
-        if not v:
-            raise ValueError("final_output must not be empty")
-        return v
+
+# -------------------------
+# Shared validators (untrusted input: JSONL files, user data)
+# -------------------------
+
+# Built once at import; validate_json runs pydantic-core's JSON path directly.
+PASS_RECORD_ADAPTER: TypeAdapter[PassRecord] = TypeAdapter(PassRecord)
+
+
+def load_pass_records(data: bytes) -> List[PassRecord]:
+    """Validate a JSONL transcript (e.g. from utils.write_jsonl_models) back into PassRecords."""
+    return [
+        PASS_RECORD_ADAPTER.validate_json(line)
+        for line in data.splitlines()
+        if line.strip()
+    ]
+
+
+# -------------------------
+# Trusted builders (core.py hot path)
+# -------------------------
+
+
+def build_pass_record(**kw: Any) -> PassRecord:
+    """
+    Build a PassRecord WITHOUT validation (model_construct).
+
+    Trusted-caller contract: only for in-process data whose types already match
+    the fields (core.py). Anything read from disk or user input must go through
+    PASS_RECORD_ADAPTER (see load_pass_records) instead. The one normalization the
+    field constraints do (stripping draft/revision) is applied here; `meta` is
+    copied so records never share a dict. Unset fields get their defaults and the
+    fields set are exactly the keys passed, as with validation, so model_dump() matches.
+    """
+    # Dev-time check of the numeric bounds model_construct skips (stripped under -O)
+    assert kw["step"] >= 0 and kw.get("token_estimate", 0) >= 0, (
+        "negative step/token_estimate"
+    )
+    kw["draft"] = kw["draft"].strip()
+    kw["revision"] = kw["revision"].strip()
+    if "meta" in kw:
+        kw["meta"] = dict(kw["meta"])
+    return PassRecord.model_construct(_fields_set=set(kw), **kw)
+
+
+def build_run_result(**kw: Any) -> RunResult:
+    """
+    Build a RunResult WITHOUT validation (model_construct); same trusted-caller
+    contract as build_pass_record. `passes` must already be PassRecords.
+    Keeps the one check that matters: final_output is stripped and non-empty.
+    """
+    final_output = kw["final_output"].strip()
+    if not final_output:
+        raise ValueError("final_output must not be empty")
+    kw["final_output"] = final_output
+    return RunResult.model_construct(_fields_set=set(kw), **kw)
 
 
 # -------------------------
@@ -186,14 +262,6 @@ class EvalScore(BaseModel):
     task_id: str
     mode: Literal["v1", "v2"]
     score_total: float = Field(ge=0.0, le=1.0)
-    breakdown: Dict[str, float] = Field(default_factory=dict)
+    breakdown: Dict[str, UnitFloat] = Field(default_factory=dict)
     notes: Optional[str] = None
     created_at: str = Field(default_factory=_utc_now_iso)
-
-    @field_validator("breakdown")
-    @classmethod
-    def _valid_breakdown(cls, v: Dict[str, float]) -> Dict[str, float]:
-        for k, val in v.items():
-            if not (0.0 <= float(val) <= 1.0):
-                raise ValueError(f"breakdown[{k}] must be in [0.0, 1.0]")
-        return v
@@ -0,0 +1,98 @@
+# src/prompt_mode/semcache.py
+"""
+Semantic cache for critic output in prompt-mode-min.
+
+- hash_embed: dependency-free embedder (hashed character trigrams, L2-normalized).
+- SemanticCache: nearest-neighbour lookup by cosine similarity with a threshold.
+
+Used by core.py to reuse a critique when a V2 pass produces a near-duplicate
+draft for the same task. Critic calls run at temperature 0.0, so a reused
+critique is what the critic would most likely have said anyway.
+
+Design goals:
+- Offline and deterministic by default; plug a real model via `embed=`
+  (e.g. a sentence-transformers encoder returning 384-d vectors).
+- Linear scan over a bounded store: runs hold a handful of entries, so an
+  ANN index would cost more than it saves.
+"""
+
+from __future__ import annotations
+
+import math
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence
+
+Vector = List[float]
+
+
+def hash_embed(text: str, dim: int = 384) -> Vector:
+    """
+    Map text to a unit vector by hashing lowercase character trigrams into `dim` buckets.
+    Stable across processes (crc32, not Python's salted hash()).
+    """
+    vec = [0.0] * dim
+    t = " ".join(text.lower().split())
+    for i in range(max(1, len(t) - 2)):
+        vec[zlib.crc32(t[i : i + 3].encode("utf-8")) % dim] += 1.0
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm == 0.0:
+        return vec
+    return [v / norm for v in vec]
+
+
+def cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosine similarity; assumes equal-length vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    if na == 0.0 or nb == 0.0:
+        return 0.0
+    return dot / (na * nb)
+
+
+@dataclass
+class SemanticCache:
+    """
+    Return a stored value when a new key text is similar enough to an old one.
+
+    - threshold: minimum cosine similarity for a hit (default 0.95).
+    - max_entries: oldest entries are evicted first once full.
+    - scope: entries only match lookups with the exact same scope (e.g. a task
+      hash), so similarity is judged on the text that actually varies.
+    """
+
+    threshold: float = 0.95
+    max_entries: int = 1024
+    embed: Callable[[str], Vector] = hash_embed
+    _vectors: List[Vector] = field(default_factory=list)
+    _values: List[str] = field(default_factory=list)
+    _scopes: List[str] = field(default_factory=list)
+
+    def lookup(self, text: str, scope: str = "") -> Optional[str]:
+        """Return the value of the nearest same-scope entry if its similarity >= threshold."""
+        if scope not in self._scopes:
+            return None
+        q = self.embed(text)
+        best_i, best_sim = -1, -1.0
+        for i, v in enumerate(self._vectors):
+            if self._scopes[i] != scope:
+                continue
+            sim = cosine(q, v)
+            if sim > best_sim:
+                best_i, best_sim = i, sim
+        if best_sim >= self.threshold:
+            return self._values[best_i]
+        return None
+
+    def add(self, text: str, value: str, scope: str = "") -> None:
+        if len(self._vectors) >= self.max_entries:
+            self._vectors.pop(0)
+            self._values.pop(0)
+            self._scopes.pop(0)
+        self._vectors.append(self.embed(text))
+        self._values.append(value)
+        self._scopes.append(scope)
+
+    def __len__(self) -> int:
+        return len(self._values)
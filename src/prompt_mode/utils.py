@@ -5,25 +5,52 @@ Utilities for prompt-mode-min:
 - Truncation for chat-style messages.
 - Basic sanitization to avoid prompt breakage.
 - Human-readable diffs for artifacts.
+- Buffered JSONL transcript writes (orjson when installed).
 
 Deliberately simple and opinionated. This is glue, not a tokenizer.
+
+Fully annotated and free of dynamic tricks so it can be compiled with mypyc
+(`mypyc --follow-imports=silent src/prompt_mode/utils.py`); the resulting
+extension module shadows this file on import, and this file remains the
+pure-Python fallback.
 """
 
 from __future__ import annotations
 
-import difflib
-import html
-import math
+import bisect
+import itertools
+import json
 import re
-from typing import Dict, List, Sequence, Tuple
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+try:  # optional speedup: pip install prompt-mode-min[fast]
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without the extra
+    orjson = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
 
 
 # -------------------------
 # Token-ish estimation
 # -------------------------
 
-AVG_CHARS_PER_TOKEN = 4  # rough heuristic for English prose
-_MIN_TOKEN = 1
+AVG_CHARS_PER_TOKEN = (
+    4  # rough heuristic for English prose; the counters below hard-code it as >> 2
+)
 
 
 def rough_token_count(text: str) -> int:
@@ -32,7 +59,7 @@ def rough_token_count(text: str) -> int:
 
     Heuristic:
       tokens ~= ceil(len(text) / AVG_CHARS_PER_TOKEN)
-    We floor at 1 when text isn't empty.
+    Computed as (n + 3) >> 2, which is already >= 1 for any non-empty text.
 
     This deliberately *overestimates* on short text and underestimates a bit on long text.
     Good enough for pass caps and truncation decisions.
@@ -40,19 +67,22 @@ def rough_token_count(text: str) -> int:
     >>> rough_token_count("hello world")
     3
     """
-    if not text:
-        return 0
-    return max(_MIN_TOKEN, math.ceil(len(text) / AVG_CHARS_PER_TOKEN))
+    return (len(text) + 3) >> 2  # ceil(n / 4) without float math; 0 for ""
 
 
 def rough_messages_token_count(messages: Sequence[Dict[str, str]]) -> int:
     """
     Sum rough token counts for a list of {"role": "...", "content": "..."} dicts.
     Roles are ignored for tokens; content only.
+
+    Same result as summing `rough_token_count` per message (each message rounds
+    up on its own), but string contents are measured inline with integer math
+    instead of a call per message; anything else goes through `str()` as before.
     """
     total = 0
     for m in messages:
-        total += rough_token_count(str(m.get("content", "")))
+        c = m.get("content", "")
+        total += (len(c) + 3) >> 2 if isinstance(c, str) else rough_token_count(str(c))
     return total
 
 
@@ -60,6 +90,7 @@ def rough_messages_token_count(messages: Sequence[Dict[str, str]]) -> int:
 # Truncation
 # -------------------------
 
+
 def truncate_text_to_tokens(text: str, max_tokens: int) -> Tuple[str, int]:
     """
     Truncate a single string to approximately fit a token budget.
@@ -86,6 +117,33 @@ def truncate_text_to_tokens(text: str, max_tokens: int) -> Tuple[str, int]:
     return truncated, rough_token_count(truncated)
 
 
+@dataclass
+class MessageBundle:
+    """
+    Struct-of-arrays view of a chat message list.
+
+    Roles, contents and per-message token counts live in parallel lists, so
+    budget math walks one int list instead of re-measuring every dict.
+    """
+
+    roles: List[str] = field(default_factory=list)
+    contents: List[str] = field(default_factory=list)
+    tokens: List[int] = field(default_factory=list)
+
+    @classmethod
+    def from_messages(cls, messages: Sequence[Dict[str, str]]) -> "MessageBundle":
+        roles = [str(m.get("role", "user")) for m in messages]
+        contents = [str(m.get("content", "")) for m in messages]
+        return cls(roles, contents, [rough_token_count(c) for c in contents])
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens)
+
+    def to_chat(self) -> List[Dict[str, str]]:
+        return [{"role": r, "content": c} for r, c in zip(self.roles, self.contents)]
+
+
 def truncate_messages(
     messages: List[Dict[str, str]],
     max_tokens: int,
@@ -108,53 +166,62 @@ def truncate_messages(
       keep_system: keep the *first* system message untouched when possible.
 
     Returns:
-      New list of messages within budget (approx).
+      New list of messages within budget (approx). Copy-on-write: untouched
+      message dicts are shared with the input; only truncated ones are new.
     """
     if max_tokens <= 0:
         return []
 
-    msgs = [dict(m) for m in messages]  # shallow copy
-    if not msgs:
-        return msgs
+    # Common case: already within budget, so nothing is mutated
+    if rough_messages_token_count(messages) <= max_tokens:
+        return list(messages)
+
+    msgs = list(messages)  # list copy only; dicts are replaced, never mutated
 
     # Optionally pin the first system message
-    pinned = []
+    pinned: List[Dict[str, str]] = []
     rest = msgs
     if keep_system and msgs[0].get("role") == "system":
         pinned = [msgs[0]]
         rest = msgs[1:]
 
-    # Drop oldest non-pinned until within budget
-    def current_tokens() -> int:
-        return rough_messages_token_count(pinned + rest)
-
-    while rest and current_tokens() > max_tokens:
-        # Prefer dropping the oldest non-recent message (front of 'rest')
-        # but never drop the *last* item (we need some prompt!)
-        if len(rest) > 1:
-            rest.pop(0)
-        else:
-            break
+    # Drop oldest non-pinned until within budget.
+    # Prefer dropping the oldest non-recent message (front of 'rest')
+    # but never drop the *last* item (we need some prompt!)
+    # Token counts are taken once; a prefix-sum bisect finds how many to drop,
+    # and the running `total` is then updated by deltas (no re-summing).
+    tokens: List[int] = []
+    total = rough_messages_token_count(pinned)
+    if rest:
+        bundle = MessageBundle.from_messages(rest)
+        prefix = list(itertools.accumulate(bundle.tokens, initial=0))
+        excess = total + prefix[-1] - max_tokens
+        drop = (
+            min(bisect.bisect_left(prefix, excess), len(rest) - 1) if excess > 0 else 0
+        )
+        rest = rest[drop:]
+        tokens = bundle.tokens[drop:]
+        total += prefix[-1] - prefix[drop]
 
     # If still over, start truncating from the oldest remaining, then the last
     i = 0
-    while current_tokens() > max_tokens and i < len(rest):
+    while total > max_tokens and i < len(rest):
         content = str(rest[i].get("content", ""))
-        # Aim to cut aggressively to converge
-        remaining_budget = max_tokens - rough_messages_token_count(pinned + rest[:i] + rest[i + 1 :])
-        remaining_budget = max(remaining_budget, 1)
-        truncated, _ = truncate_text_to_tokens(content, remaining_budget)
-        rest[i]["content"] = truncated
+        # Aim to cut aggressively to converge: budget left by everything else
+        remaining_budget = max(max_tokens - (total - tokens[i]), 1)
+        truncated, used = truncate_text_to_tokens(content, remaining_budget)
+        rest[i] = {**rest[i], "content": truncated}
+        total += used - tokens[i]
+        tokens[i] = used
         i += 1
 
     # Final safety: if still over, truncate the newest (last) message
-    if rest and current_tokens() > max_tokens:
+    if rest and total > max_tokens:
         j = len(rest) - 1
         content = str(rest[j].get("content", ""))
-        remaining_budget = max_tokens - rough_messages_token_count(pinned + rest[:j])
-        remaining_budget = max(remaining_budget, 1)
+        remaining_budget = max(max_tokens - (total - tokens[j]), 1)
         truncated, _ = truncate_text_to_tokens(content, remaining_budget)
-        rest[j]["content"] = truncated
+        rest[j] = {**rest[j], "content": truncated}
 
     return pinned + rest
 
@@ -163,9 +230,22 @@ def truncate_messages(
 # Sanitization
 # -------------------------
 
-_NONPRINTABLE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
-_MULTISPACE = re.compile(r"[ \t]{2,}")
-_MULTILINE = re.compile(r"\n{3,}")
+# Control chars except \t and \n, deleted by one C-level str.translate.
+_CTRL_TABLE = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20)])
+# Whitespace runs and runaway code fences, fixed in ONE regex pass; the group that
+# matched picks the replacement (m.lastindex -> _SANITIZE_REPL).
+_SANITIZE_RE = re.compile(r"([ \t]{2,})|(\n{3,})|(`{4,})")
+_SANITIZE_REPL = (
+    "",
+    "  ",
+    "\n\n",
+    "```",
+)  # at most two spaces (readability), one blank line, 3 backticks
+_MULTIBACKTICK = re.compile(r"`{4,}")
+
+
+def _sanitize_dispatch(m: "re.Match[str]") -> str:
+    return _SANITIZE_REPL[m.lastindex or 0]
 
 
 def sanitize_text(text: str) -> str:
@@ -176,19 +256,20 @@ def sanitize_text(text: str) -> str:
       - Escape stray HTML that might confuse renderers (keeps content readable).
       - Guard against runaway code fences by normalizing backticks count.
 
+    Runs as translate + one fused regex pass; html.unescape only when the text
+    has an '&' (entities can yield backticks, so fences are re-checked then).
+
     NOTE: This is intentionally conservative to avoid altering meaning.
     """
     if not text:
         return ""
 
-    t = _NONPRINTABLE.sub("", text)
-    t = _MULTISPACE.sub("  ", t)  # keep at most two spaces (readability)
-    t = _MULTILINE.sub("\n\n", t)
-    # Escape but preserve readability
-    t = html.unescape(t)  # normalize any double-escaped entities the model might emit
+    t = _SANITIZE_RE.sub(_sanitize_dispatch, text.translate(_CTRL_TABLE))
+    if "&" in t:
+        import html  # lazy: only texts with entities pay for it
 
-    # Normalize wild code fences: keep at most 3 backticks sequences
-    t = re.sub(r"`{4,}", "```", t)
+        # normalize any double-escaped entities the model might emit
+        t = _MULTIBACKTICK.sub("```", html.unescape(t))
 
     return t.strip()
 
@@ -197,42 +278,170 @@ def sanitize_text(text: str) -> str:
 # Diffs for artifacts
 # -------------------------
 
+_DIFF_MAX_LINES = (
+    500  # changed region larger than this (either side) gets a summary, not a diff
+)
+_RE_HUNK = re.compile(r"^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@")
+
+
+def _shift_hunk(line: str, offset: int) -> str:
+    """Move a '@@ -a,b +c,d @@' header down by `offset` lines (for trimmed inputs)."""
+    m = _RE_HUNK.match(line)
+    if not m:
+        return line
+    a_start, a_len, b_start, b_len = m.groups()
+    return (
+        f"@@ -{int(a_start) + offset}{a_len or ''} +{int(b_start) + offset}{b_len or ''} @@"
+        + line[m.end() :]
+    )
+
+
+def _split_lines(text: str) -> List[str]:
+    """'\\n'-only line split (no trailing empty item), cheaper than splitlines()."""
+    lines = text.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    return lines
+
+
 def diff_text(a: str, b: str, context: int = 2) -> str:
     """
     Produce a small unified diff between two strings for JSONL artifacts.
 
     Returns a single string. Empty string means "no changes".
 
+    Lines shared at both ends (beyond `context`) are trimmed before difflib runs,
+    so near-copies only pay for the region that changed; hunk headers are shifted
+    back to full-text line numbers. The result is a valid diff of a -> b, though
+    with repeated lines its hunks can differ from untrimmed difflib output.
+
+    A changed region over _DIFF_MAX_LINES lines yields a one-hunk summary
+    ("N lines replaced by M lines") instead of a line-by-line diff. That output
+    is for humans only: it cannot be applied with patch or git apply.
+
+    Lines are split on '\\n' only (str.split, not splitlines): faster on long
+    text, but '\\r', '\\f', '\\u2028' etc. stay inside lines. Model output uses
+    '\\n', and CRLF text simply shows a trailing '\\r' per line.
+
     >>> diff_text("foo\\nbar\\n", "foo\\nbaz\\n")
-    '--- a\\n+++ b\\n@@\\n-bar\\n+baz\\n'
+    '--- a\\n+++ b\\n@@ -1,2 +1,2 @@\\n foo\\n-bar\\n+baz'
     """
-    if a == b:
+    if a is b or a == b:
         return ""
-
-    a_lines = a.splitlines(keepends=False)
-    b_lines = b.splitlines(keepends=False)
-    udiff = difflib.unified_diff(
-        a_lines,
-        b_lines,
+    if not a or not b:
+        # Pure insertion/deletion: no matching needed, emit difflib's exact format
+        lines = _split_lines(a or b)
+        span = f"1,{len(lines)}" if len(lines) > 1 else "1"
+        header = f"@@ -{span} +0,0 @@" if a else f"@@ -0,0 +{span} @@"
+        sign = "-" if a else "+"
+        return "\n".join(["--- a", "+++ b", header, *(sign + line for line in lines)])
+
+    a_lines = _split_lines(a)
+    b_lines = _split_lines(b)
+
+    # Common prefix/suffix (suffix never overlaps the prefix)
+    limit = min(len(a_lines), len(b_lines))
+    i = 0
+    while i < limit and a_lines[i] == b_lines[i]:
+        i += 1
+    j = 0
+    while j < limit - i and a_lines[-1 - j] == b_lines[-1 - j]:
+        j += 1
+
+    changed_a, changed_b = len(a_lines) - i - j, len(b_lines) - i - j
+    if max(changed_a, changed_b) > _DIFF_MAX_LINES:
+        return (
+            f"--- a\n+++ b\n@@ -{i + 1},{changed_a} +{i + 1},{changed_b} @@\n"
+            f"{changed_a} lines replaced by {changed_b} lines (too large to diff)"
+        )
+
+    import difflib  # lazy: keeps it off the CLI/import path until a diff is needed
+
+    # Keep `context` shared lines on each side so edge hunks keep their context.
+    # The result is a valid diff of a -> b, but when lines repeat, difflib may
+    # anchor hunks differently than it would on the untrimmed text.
+    lo = max(0, i - context)
+    a_hi = len(a_lines) - max(0, j - context)
+    b_hi = len(b_lines) - max(0, j - context)
+    udiff: Iterator[str] = difflib.unified_diff(
+        a_lines[lo:a_hi],
+        b_lines[lo:b_hi],
         fromfile="a",
         tofile="b",
         n=context,
         lineterm="",
     )
+    if lo:
+        udiff = (
+            _shift_hunk(line, lo) if line.startswith("@@") else line for line in udiff
+        )
     out = "\n".join(udiff)
     return out
 
 
+# -------------------------
+# JSONL transcripts
+# -------------------------
+
+
+def dumps_jsonl(rows: Iterable[Dict[str, Any]]) -> bytes:
+    """
+    Encode rows as one JSONL buffer (UTF-8, non-ASCII kept as-is).
+    Uses orjson when available; stdlib json otherwise.
+    """
+    if orjson is not None:
+        lines = [orjson.dumps(r, option=orjson.OPT_NON_STR_KEYS) for r in rows]
+    else:
+        lines = [json.dumps(r, ensure_ascii=False).encode("utf-8") for r in rows]
+    if not lines:
+        return b""
+    return b"\n".join(lines) + b"\n"
+
+
+def dump_jsonl_line(m: "BaseModel") -> bytes:
+    """
+    One JSONL line for a pydantic model, serialized by pydantic-core directly
+    (no intermediate dict, non-ASCII kept as-is). Write it to a binary file.
+    """
+    return m.model_dump_json().encode("utf-8") + b"\n"
+
+
+JSONL_WRITE_BUFFER = (
+    1 << 16
+)  # bytes; transcript handles should be opened with this buffering
+
+
+def write_jsonl_models(path: Path, models: Iterable["BaseModel"]) -> None:
+    """
+    Write models to `path` as JSONL: lines are joined in memory and go out as
+    one write() on a 64 KiB buffered handle with a single flush at the end.
+    Creates parent dirs.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb", buffering=JSONL_WRITE_BUFFER) as f:
+        f.write(b"".join(dump_jsonl_line(m) for m in models))
+        f.flush()
+
+
+def write_jsonl(path: Path, rows: Iterable[Dict[str, Any]]) -> None:
+    """Write rows to `path` as JSONL with a single write call (creates parent dirs)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(dumps_jsonl(rows))
+
+
 # -------------------------
 # Small helpers
 # -------------------------
 
+
 def clamp(n: int, low: int, high: int) -> int:
     """Clamp integer n into [low, high]."""
     return max(low, min(high, n))
 
 
-def coalesce(*values, default=None):
+def coalesce(*values: Optional[Any], default: Any = None) -> Any:
     """Return the first value that is not None, else default."""
     for v in values:
         if v is not None:
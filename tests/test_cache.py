@@ -0,0 +1,81 @@
+# tests/test_cache.py
+import os
+
+import pytest  # pyright: ignore[reportMissingImports]
+
+from prompt_mode.cache import ResponseCache
+from prompt_mode.llm import CachingLLM, LocalMock
+
+
+@pytest.fixture(autouse=True)
+def _force_offline_env():
+    os.environ["PM_FORCE_MOCK"] = "1"
+    os.environ["NO_NETWORK"] = "1"
+    yield
+    os.environ.pop("PM_FORCE_MOCK", None)
+    os.environ.pop("NO_NETWORK", None)
+
+
+class _CountingMock(LocalMock):
+    calls: int = 0
+
+    def generate(self, messages, **kwargs):
+        self.calls += 1
+        return super().generate(messages, **kwargs)
+
+
+def _msgs(text: str):
+    return [
+        {"role": "system", "content": "You are a CRITIC."},
+        {"role": "user", "content": text},
+    ]
+
+
+def test_response_cache_roundtrip_and_ttl_expiry():
+    cache = ResponseCache()
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    assert cache.get("missing") is None
+    cache.set("old", "v", ttl=-1)
+    assert cache.get("old") is None
+
+
+def test_caching_llm_hits_on_identical_low_temperature_calls(tmp_path):
+    inner = _CountingMock()
+    model = CachingLLM(inner, ResponseCache(str(tmp_path / "cache.sqlite3")))
+
+    first = model.generate(_msgs("candidate"), temperature=0.0, max_tokens=128)
+    second = model.generate(_msgs("candidate"), temperature=0.0, max_tokens=128)
+    assert first == second
+    assert inner.calls == 1
+
+    # Different params are a different key
+    model.generate(_msgs("candidate"), temperature=0.0, max_tokens=64)
+    assert inner.calls == 2
+
+
+def test_caching_llm_bypasses_high_temperature_calls():
+    inner = _CountingMock()
+    model = CachingLLM(inner, ResponseCache())
+
+    model.generate(_msgs("candidate"), temperature=0.9)
+    model.generate(_msgs("candidate"), temperature=0.9)
+    assert inner.calls == 2
+
+
+def test_caching_llm_agenerate_falls_back_to_inner_generate():
+    import asyncio
+
+    class _Plain:
+        calls = 0
+
+        def generate(self, messages, **kwargs):
+            self.calls += 1
+            return LocalMock().generate(messages, **kwargs)
+
+    inner = _Plain()
+    model = CachingLLM(inner, ResponseCache())
+    first = asyncio.run(model.agenerate(_msgs("candidate"), temperature=0.0))
+    second = asyncio.run(model.agenerate(_msgs("candidate"), temperature=0.0))
+    assert first == second == LocalMock().generate(_msgs("candidate"), temperature=0.0)
+    assert inner.calls == 1
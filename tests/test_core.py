@@ -1,13 +1,16 @@
 # tests/test_core.py
+import asyncio
 import os
+from dataclasses import dataclass, field
 from pathlib import Path
-import json
+from typing import Callable, List, Optional, Tuple
 
 import pytest
 
+from prompt_mode import utils
 from prompt_mode.core import PromptModeV1, PromptModeV2
 from prompt_mode.llm import LocalMock
-from prompt_mode.schemas import V2Config
+from prompt_mode.schemas import V2Config, load_pass_records
 
 
 @pytest.fixture(autouse=True)
@@ -35,7 +38,48 @@ def _read(p: Path) -> str:
     return p.read_text(encoding="utf-8").strip()
 
 
-def test_v1_email_flow_is_deterministic_and_records_passes(examples_dir: Path, tmp_path: Path):
+@dataclass
+class _RecordingMock(LocalMock):
+    """
+    LocalMock that records every call as (kind, messages); kind is "critic",
+    "judge" or "other", classified by the system prompt.
+
+    - judge_reply: canned output for judge calls instead of the mock's default.
+    - on_call: invoked with the kind before each reply (to peek at run state).
+    """
+
+    judge_reply: Optional[str] = None
+    on_call: Optional[Callable[[str], None]] = None
+    calls: List[Tuple[str, list]] = field(default_factory=list)
+
+    def of_kind(self, kind: str) -> List[list]:
+        return [m for k, m in self.calls if k == kind]
+
+    def _respond(self, messages, max_tokens):
+        system = messages[0]["content"]
+        kind = (
+            "critic"
+            if "CRITIC" in system
+            else "judge"
+            if "JUDGE" in system
+            else "other"
+        )
+        self.calls.append((kind, messages))
+        if self.on_call is not None:
+            self.on_call(kind)
+        if kind == "judge" and self.judge_reply is not None:
+            return self.judge_reply
+        return super()._respond(messages, max_tokens)
+
+
+@pytest.fixture
+def recording_mock() -> _RecordingMock:
+    return _RecordingMock()
+
+
+def test_v1_email_flow_is_deterministic_and_records_passes(
+    examples_dir: Path, tmp_path: Path
+):
     task_file = examples_dir / "email_tone_fix.md"
     task_text = _read(task_file)
 
@@ -51,7 +95,9 @@ def test_v1_email_flow_is_deterministic_and_records_passes(examples_dir: Path, t
     assert p0.draft and p0.revision, "Pass should include draft and revision"
     assert "[MOCK]" in p0.revision, "LocalMock tag should appear in revision"
     # V1 should produce an email-style revision for this task
-    assert result.final_output.startswith("[MOCK] Revised Email"), "Unexpected final output format for email task"
+    assert result.final_output.startswith("[MOCK] Revised Email"), (
+        "Unexpected final output format for email task"
+    )
 
     # Token accounting should be non-zero and monotonic per pass record
     assert result.token_count > 0
@@ -59,10 +105,8 @@ def test_v1_email_flow_is_deterministic_and_records_passes(examples_dir: Path, t
 
     # Save a transient transcript as JSONL to ensure serializability
     out_path = tmp_path / "v1_email.jsonl"
-    with out_path.open("w", encoding="utf-8") as f:
-        for rec in result.passes:
-            f.write(json.dumps(rec.model_dump(), ensure_ascii=False) + "\n")
-    assert out_path.exists()
+    utils.write_jsonl_models(out_path, result.passes)
+    assert load_pass_records(out_path.read_bytes()) == result.passes
 
 
 def test_v2_sql_flow_has_plan_passes_and_sql_review(examples_dir: Path):
@@ -71,7 +115,9 @@ def test_v2_sql_flow_has_plan_passes_and_sql_review(examples_dir: Path):
 
     model = LocalMock()
     # Keep defaults; allow early stop if critic is high enough
-    runner = PromptModeV2(model=model, max_passes=2, config=V2Config(max_passes=2, early_stop_score=0.9))
+    runner = PromptModeV2(
+        model=model, max_passes=2, config=V2Config(max_passes=2, early_stop_score=0.9)
+    )
     result = runner.run(task_text)
 
     assert result.mode == "v2"
@@ -85,7 +131,12 @@ def test_v2_sql_flow_has_plan_passes_and_sql_review(examples_dir: Path):
     assert "```sql" in result.final_output
 
     # Stopped reason is either early_stop or complete under small caps
-    assert result.stopped_reason in {"early_stop", "complete", "max_passes", "token_budget"}
+    assert result.stopped_reason in {
+        "early_stop",
+        "complete",
+        "max_passes",
+        "token_budget",
+    }
 
     # Basic accounting checks
     assert result.token_count > 0
@@ -104,6 +155,409 @@ def test_v2_early_stop_threshold_is_respected(examples_dir: Path):
     runner = PromptModeV2(model=model, max_passes=5, config=cfg)
     result = runner.run(task_text)
 
-    assert len(result.passes) == 1, "With early_stop_score=0.0, should stop after first pass"
+    assert len(result.passes) == 1, (
+        "With early_stop_score=0.0, should stop after first pass"
+    )
     assert result.stopped_reason in {"early_stop", "complete"}
     assert "[MOCK]" in result.final_output
+
+
+def test_v2_arun_matches_run_and_gathers_tasks(examples_dir: Path):
+    tasks = [
+        _read(examples_dir / name)
+        for name in (
+            "email_tone_fix.md",
+            "sql_query_review.md",
+            "bug_report_summarize.md",
+        )
+    ]
+    runner = PromptModeV2(
+        model=LocalMock(), max_passes=2, config=V2Config(max_passes=2)
+    )
+
+    async def _gather():
+        return await asyncio.gather(*[runner.arun(t) for t in tasks])
+
+    results = asyncio.run(_gather())
+
+    assert [r.mode for r in results] == ["v2", "v2", "v2"]
+    sync = runner.run(tasks[1])
+    assert results[1].final_output == sync.final_output
+    assert len(results[1].passes) == len(sync.passes)
+
+
+def test_system_messages_are_static_prefixes(
+    examples_dir: Path, recording_mock: _RecordingMock
+):
+    from prompt_mode import core
+
+    PromptModeV2(
+        model=recording_mock,
+        max_passes=2,
+        config=V2Config(max_passes=2, early_stop_score=None),
+    ).run(_read(examples_dir / "email_tone_fix.md"))
+
+    seen = [messages[0] for _, messages in recording_mock.calls]
+    assert all(m["role"] == "system" for m in seen)
+    assert {m["content"] for m in seen} <= {core._SYSTEM_V2, core._CRITIC_GUIDELINES}
+
+
+def test_v2_semantic_critic_cache_skips_repeat_critiques(
+    examples_dir: Path, recording_mock: _RecordingMock
+):
+    from prompt_mode.semcache import SemanticCache
+
+    cache = SemanticCache()
+    runner = PromptModeV2(
+        model=recording_mock,
+        max_passes=3,
+        config=V2Config(max_passes=3, early_stop_score=None),
+        critic_cache=cache,
+    )
+    result = runner.run(_read(examples_dir / "bug_report_summarize.md"))
+
+    # LocalMock drafts are identical every pass, so only the first is critiqued.
+    assert len(result.passes) == 3
+    assert len(recording_mock.of_kind("critic")) == 1
+    assert len({p.critique for p in result.passes}) == 1
+
+
+def test_semantic_critic_cache_keys_on_draft_within_same_task(
+    recording_mock: _RecordingMock,
+):
+    from prompt_mode import core
+    from prompt_mode.semcache import SemanticCache
+
+    cache = SemanticCache()
+    task = "Review this SQL query for correctness and performance. " * 20
+    drafts = [
+        "Use explicit columns.",
+        "Add an index on user_id.",
+        "Bound the date range.",
+    ]
+    for draft in drafts:
+        core._drive(core._critique(cache, task, draft, 30), recording_mock)
+    assert len(recording_mock.of_kind("critic")) == len(
+        drafts
+    )  # a long shared task no longer masks the draft
+
+    core._drive(core._critique(cache, task, drafts[0], 30), recording_mock)
+    assert len(recording_mock.of_kind("critic")) == len(
+        drafts
+    )  # same task + same draft still hits
+    core._drive(
+        core._critique(cache, task + " Also check NULLs.", drafts[0], 30),
+        recording_mock,
+    )
+    assert (
+        len(recording_mock.of_kind("critic")) == len(drafts) + 1
+    )  # a different task never shares
+
+
+def test_v2_run_batch_matches_individual_runs(examples_dir: Path):
+    tasks = [
+        _read(examples_dir / name)
+        for name in (
+            "email_tone_fix.md",
+            "sql_query_review.md",
+            "bug_report_summarize.md",
+        )
+    ]
+    batch_sizes = []
+
+    class _Recording(LocalMock):
+        def generate_batch(self, batch, **kwargs):
+            batch_sizes.append(len(batch))
+            return super().generate_batch(batch, **kwargs)
+
+    runner = PromptModeV2(
+        model=_Recording(),
+        max_passes=2,
+        config=V2Config(max_passes=2, early_stop_score=None),
+    )
+    results = runner.run_batch(tasks)
+
+    assert [r.final_output for r in results] == [
+        runner.run(t).final_output for t in tasks
+    ]
+    assert batch_sizes[0] == len(tasks)  # plans for all tasks go out together
+
+
+def test_drivers_accept_models_with_only_generate(examples_dir: Path):
+    import re
+
+    from prompt_mode import core
+
+    class _Plain:
+        def generate(self, messages, **kwargs):
+            return LocalMock().generate(messages, **kwargs)
+
+    task_text = _read(examples_dir / "email_tone_fix.md")
+    cfg = V2Config(max_passes=2, early_stop_score=None)
+    expected = (
+        PromptModeV2(model=LocalMock(), max_passes=2, config=cfg)
+        .run(task_text)
+        .final_output
+    )
+    runner = PromptModeV2(model=_Plain(), max_passes=2, config=cfg)
+    assert runner.run(task_text).final_output == expected
+    assert asyncio.run(runner.arun(task_text)).final_output == expected
+    assert runner.run_batch([task_text])[0].final_output == expected
+
+    call = core._Call(
+        [{"role": "user", "content": "x"}], 0.0, 16, 30, stop_at=re.compile("MOCK")
+    )
+    assert core._generate(_Plain(), call).endswith(
+        "MOCK"
+    )  # stop_at still applied without streaming
+
+
+def test_critic_stream_stops_at_overall_line_without_losing_critique(
+    examples_dir: Path,
+):
+    read = []
+
+    @dataclass
+    class _Chatty(_RecordingMock):
+        def generate_stream(self, messages, **kwargs):
+            for chunk in super().generate_stream(messages, **kwargs):
+                read.append(chunk)
+                yield chunk
+            yield "Anything after the score line is never read.\n"
+            read.append("TRAILING")
+
+    model = _Chatty()
+    result = PromptModeV2(model=model, max_passes=1, config=V2Config(max_passes=1)).run(
+        _read(examples_dir / "sql_query_review.md")
+    )
+
+    critique = result.passes[0].critique
+    assert critique.splitlines()[-1].startswith("**Overall**:")
+    assert "Improvements:" in critique  # the mock puts them before the score line
+    assert "TRAILING" not in read and "never read" not in critique
+    revision_prompt = model.calls[-1][1][-1]["content"]
+    assert critique in revision_prompt
+
+
+def test_v2_skips_revision_when_budget_would_overrun(
+    examples_dir: Path, recording_mock: _RecordingMock
+):
+    # Tiny budget: (200 + 100) * 4 = 1200 tokens; plan+draft+critique already approach it.
+    cfg = V2Config(
+        max_passes=3, early_stop_score=None, max_input_tokens=200, max_output_tokens=100
+    )
+    result = PromptModeV2(model=recording_mock, max_passes=3, config=cfg).run(
+        _read(examples_dir / "sql_query_review.md")
+    )
+
+    assert result.stopped_reason == "token_budget"
+    last = result.passes[-1]
+    assert last.phase == "critique"
+    assert last.revision == last.draft
+    assert len(recording_mock.calls) == 1 + 2 * len(
+        result.passes
+    )  # plan + (draft, critique) per pass; no revision
+
+
+def test_arun_batch_bounds_in_flight_calls(examples_dir: Path):
+    tasks = [
+        _read(examples_dir / name)
+        for name in (
+            "email_tone_fix.md",
+            "sql_query_review.md",
+            "bug_report_summarize.md",
+        )
+    ]
+    in_flight = [0]
+    peak = [0]
+
+    class _Tracking(LocalMock):
+        async def agenerate(self, messages, **kwargs):
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            try:
+                return await super().agenerate(messages, **kwargs)
+            finally:
+                in_flight[0] -= 1
+
+    runner = PromptModeV2(
+        model=_Tracking(),
+        max_passes=2,
+        config=V2Config(max_passes=2, early_stop_score=None),
+    )
+    results = asyncio.run(runner.arun_batch(tasks, max_concurrency=2))
+
+    assert peak[0] == 2
+    assert [r.final_output for r in results] == [
+        runner.run(t).final_output for t in tasks
+    ]
+
+
+def test_diff_is_lazy_unless_record_diff(examples_dir: Path):
+    task_text = _read(examples_dir / "bug_report_summarize.md")
+
+    lazy = PromptModeV1(model=LocalMock()).run(task_text).passes[0]
+    assert lazy.diff is None
+    assert lazy.compute_diff() == lazy.diff  # memoized on first access
+
+    from prompt_mode.schemas import V1Config
+
+    eager = (
+        PromptModeV1(model=LocalMock(), config=V1Config(record_diff=True))
+        .run(task_text)
+        .passes[0]
+    )
+    assert eager.diff is not None
+    assert eager.diff == lazy.diff
+
+
+def test_prompt_files_are_memoized_and_can_be_baked(monkeypatch):
+    from prompt_mode import core
+
+    core._read_prompt_file.cache_clear()
+    try:
+        monkeypatch.setenv("PM_BAKED_PROMPTS", "1")
+        assert core._read_prompt_file("system_v1.txt", "  BAKED  ") == "BAKED"
+
+        monkeypatch.delenv("PM_BAKED_PROMPTS")
+        core._read_prompt_file.cache_clear()
+        first = core._read_prompt_file("system_v1.txt", "fallback")
+        assert first != "fallback"  # read from prompts/system_v1.txt
+        core._read_prompt_file("system_v1.txt", "fallback")
+        assert core._read_prompt_file.cache_info().hits >= 1
+    finally:
+        core._read_prompt_file.cache_clear()
+
+
+def test_deterministic_runs_memoize_critiques_across_runs(
+    examples_dir: Path, recording_mock: _RecordingMock
+):
+    from prompt_mode import core
+
+    core._CRITIC_MEMO.clear()
+    task_text = _read(examples_dir / "sql_query_review.md")
+    cfg = V2Config(max_passes=1, temperature=0.0)
+    first = PromptModeV2(model=recording_mock, max_passes=1, config=cfg).run(task_text)
+    second = PromptModeV2(model=recording_mock, max_passes=1, config=cfg).run(task_text)
+
+    assert (
+        len(recording_mock.of_kind("critic")) == 1
+    )  # second run served from _CRITIC_MEMO
+    assert first.passes[0].critique == second.passes[0].critique
+    assert second.token_count < first.token_count
+
+    # Non-zero temperature never consults the memo
+    PromptModeV2(model=recording_mock, max_passes=1, config=V2Config(max_passes=1)).run(
+        task_text
+    )
+    assert len(recording_mock.of_kind("critic")) == 2
+
+    # Another model never reuses this model's memoized critique
+    @dataclass
+    class _OtherMock(_RecordingMock):
+        pass
+
+    other = _OtherMock()
+    PromptModeV2(model=other, max_passes=1, config=cfg).run(task_text)
+    assert len(other.of_kind("critic")) == 1
+    core._CRITIC_MEMO.clear()
+
+
+def test_critic_memo_skips_semantic_cache_hits(recording_mock: _RecordingMock):
+    from prompt_mode import core
+    from prompt_mode.semcache import SemanticCache
+
+    core._CRITIC_MEMO.clear()
+    cache = SemanticCache()
+    core._drive(
+        core._critique(cache, "task", "draft", 30), recording_mock
+    )  # fills the semantic cache
+    core._drive(
+        core._critique(cache, "task", "draft", 30, memo_model=recording_mock),
+        recording_mock,
+    )
+
+    assert len(recording_mock.of_kind("critic")) == 1
+    assert not core._CRITIC_MEMO  # a reused critique is not promoted to the exact memo
+
+
+def test_speculative_v2_fans_out_drafts_and_judges_once(
+    examples_dir: Path, recording_mock: _RecordingMock
+):
+    recording_mock.judge_reply = (
+        '{"scores": [0.5, 0.9, 0.7], "best": 2, "critique": "Tighten the wording."}'
+    )
+    task_text = _read(examples_dir / "sql_query_review.md")
+    cfg = V2Config(max_passes=3, early_stop_score=None)
+    engine = PromptModeV2(
+        model=recording_mock, max_passes=3, config=cfg, speculative=True
+    )
+    res = engine.run(task_text)
+
+    # plan, 3 drafts, judge, one revision
+    assert [k for k, _ in recording_mock.calls] == ["other"] * 4 + ["judge", "other"]
+    assert [p.phase for p in res.passes] == ["draft", "draft", "draft", "revision"]
+    assert res.passes[-1].draft == res.passes[1].draft  # candidate 2 won
+    assert res.passes[-1].critique == "Tighten the wording."
+    assert res.stopped_reason == "complete"
+
+    # Same flow through the async and batch drivers
+    assert asyncio.run(engine.arun(task_text)).final_output == res.final_output
+    assert engine.run_batch([task_text])[0].final_output == res.final_output
+
+    # early_stop_score set -> normal iterative loop
+    iterative = PromptModeV2(model=LocalMock(), max_passes=3, speculative=True).run(
+        task_text
+    )
+    assert all(p.phase != "draft" for p in iterative.passes)
+
+
+def test_parse_judge_falls_back_on_non_json():
+    from prompt_mode.core import _parse_judge
+
+    assert _parse_judge('```json\n{"best": 3, "critique": "x"}\n```', 3) == (2, "x")
+    assert _parse_judge('{"scores": [0.2, 0.8]}', 2)[0] == 1
+    assert _parse_judge("**Overall**: 0.9", 2) == (0, "**Overall**: 0.9")
+
+
+def test_transcript_sink_streams_each_pass_as_produced(
+    examples_dir: Path, recording_mock: _RecordingMock
+):
+    import io
+
+    from prompt_mode import core
+
+    task_text = _read(examples_dir / "sql_query_review.md")
+    sink = io.BytesIO()
+    seen_at_critic = []
+
+    def _peek(kind: str) -> None:
+        if kind == "critic":
+            seen_at_critic.append(sink.getvalue().count(b"\n"))
+
+    recording_mock.on_call = _peek
+
+    core._CRITIC_MEMO.clear()
+    cfg = V2Config(max_passes=3, early_stop_score=None)
+    res = PromptModeV2(model=recording_mock, max_passes=3, config=cfg).run(
+        task_text, transcript_sink=sink
+    )
+
+    assert load_pass_records(sink.getvalue()) == res.passes
+    assert seen_at_critic == list(
+        range(len(res.passes))
+    )  # pass k is on disk before pass k+1 critiques
+
+
+def test_pass_record_meta_is_not_shared_between_runs(examples_dir: Path):
+    task_text = _read(examples_dir / "email_tone_fix.md")
+    runner = PromptModeV2(
+        model=LocalMock(),
+        max_passes=2,
+        config=V2Config(max_passes=2, early_stop_score=None),
+    )
+    first = runner.run(task_text)
+    first.passes[0].meta["k"] = "v"
+
+    assert all("k" not in p.meta for p in first.passes[1:])
+    assert all(p.meta == {"mode": "v2"} for p in runner.run(task_text).passes)
@@ -1,7 +1,9 @@
 # tests/test_llm_mock.py
+import asyncio
 import os
 import re
-import pytest # pyright: ignore[reportMissingImports]
+
+import pytest  # pyright: ignore[reportMissingImports]
 
 from prompt_mode.llm import LocalMock
 
@@ -26,7 +28,10 @@ def _user(text: str):
 
 def test_determinism_same_input_same_output():
     mock = LocalMock()
-    msgs = [_sys("you are a helpful model"), _user("please rewrite this email to be more polite and professional")]
+    msgs = [
+        _sys("you are a helpful model"),
+        _user("please rewrite this email to be more polite and professional"),
+    ]
     out1 = mock.generate(msgs, temperature=0.9, max_tokens=256)
     out2 = mock.generate(msgs, temperature=0.1, max_tokens=256)
     # LocalMock should be deterministic regardless of temperature for tests
@@ -36,7 +41,10 @@ def test_determinism_same_input_same_output():
 
 def test_email_mode_produces_email_template():
     mock = LocalMock()
-    msgs = [_sys(""), _user("Please rewrite this email to be more polite and professional.")]
+    msgs = [
+        _sys(""),
+        _user("Please rewrite this email to be more polite and professional."),
+    ]
     out = mock.generate(msgs, max_tokens=256)
     assert out.startswith("[MOCK] Revised Email"), "Expected email revision heading"
     assert "Subject:" in out
@@ -78,7 +86,7 @@ def test_critic_mode_detects_system_and_emits_scores_and_overall():
     # Include 'critic' keyword in system to trigger critic behavior
     msgs = [
         _sys("You are a CRITIC. Provide a concise critique with scores."),
-        _user("Some candidate answer to be reviewed.")
+        _user("Some candidate answer to be reviewed."),
     ]
     out = mock.generate(msgs, temperature=0.0, max_tokens=128)
     # Check the three scored dimensions and Overall line
@@ -94,7 +102,9 @@ def test_respects_max_tokens_via_truncation_marker():
     # Force tiny budget to ensure truncation occurs
     msgs = [_sys("you are helpful"), _user("SELECT * FROM users JOIN orders;")]
     out = mock.generate(msgs, max_tokens=1)  # 1 token ~ 4 chars threshold
-    assert "…[truncated]" in out, "Expected output to be truncated for extremely small max_tokens"
+    assert "…[truncated]" in out, (
+        "Expected output to be truncated for extremely small max_tokens"
+    )
 
 
 def test_latency_is_small_and_timeout_param_is_accepted():
@@ -103,3 +113,88 @@ def test_latency_is_small_and_timeout_param_is_accepted():
     # Should return quickly and accept timeout_seconds kwarg
     out = mock.generate(msgs, timeout_seconds=5)
     assert out.startswith("[MOCK]")
+
+
+def test_agenerate_matches_generate():
+    mock = LocalMock()
+    msgs = [_sys("system"), _user("SELECT * FROM users JOIN orders;")]
+    out = asyncio.run(mock.agenerate(msgs, max_tokens=512))
+    assert out == mock.generate(msgs, max_tokens=512)
+
+
+def test_generate_batch_matches_generate_per_item():
+    mock = LocalMock()
+    batch = [
+        [_sys(""), _user("Please rewrite this email to be more polite.")],
+        [_sys(""), _user("SELECT * FROM users JOIN orders;")],
+    ]
+    assert mock.generate_batch(batch, max_tokens=256) == [
+        mock.generate(m, max_tokens=256) for m in batch
+    ]
+
+
+def test_generate_stream_chunks_join_to_generate():
+    mock = LocalMock()
+    msgs = [_sys("You are a CRITIC."), _user("candidate")]
+    chunks = list(mock.generate_stream(msgs, temperature=0.0, max_tokens=256))
+    assert len(chunks) > 1
+    assert "".join(chunks) == mock.generate(msgs, temperature=0.0, max_tokens=256)
+
+
+def test_retry_helper_retries_only_listed_errors(monkeypatch):
+    from prompt_mode.llm import base
+
+    monkeypatch.setattr(base.time, "sleep", lambda s: None)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TimeoutError("slow")
+        return "ok"
+
+    assert base._call_with_retries(flaky, retry_on=(TimeoutError,), attempts=3) == "ok"
+    assert len(attempts) == 3
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad")
+
+    attempts.clear()
+    with pytest.raises(ValueError):
+        base._call_with_retries(broken, retry_on=(TimeoutError,), attempts=3)
+    assert len(attempts) == 1  # non-retryable errors fail fast
+
+    assert all(0.0 <= base._backoff_delay(a) <= 4.0 for a in range(10))
+
+
+def test_adapters_load_lazily():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, prompt_mode.llm as llm;"
+        "assert 'prompt_mode.llm.openai_adapter' not in sys.modules;"
+        "llm.OpenAIAdapter;"
+        "assert 'prompt_mode.llm.openai_adapter' in sys.modules"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+
+def test_asyncio_loads_lazily():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, prompt_mode.core, prompt_mode.llm.mock;"
+        "assert 'asyncio' not in sys.modules"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
@@ -0,0 +1,87 @@
+# tests/test_schemas.py
+import pytest  # pyright: ignore[reportMissingImports]
+
+from prompt_mode.schemas import (
+    PassRecord,
+    RunResult,
+    build_pass_record,
+    build_run_result,
+)
+
+
+def test_build_pass_record_matches_validated_record():
+    kw = dict(
+        step=1,
+        phase="revision",
+        draft="  d  ",
+        critique="c",
+        revision=" r\n",
+        meta={"mode": "v2"},
+    )
+    built = build_pass_record(**dict(kw))
+    validated = PassRecord.model_validate(kw)
+
+    a, b = built.model_dump(), validated.model_dump()
+    a.pop("created_at"), b.pop("created_at")
+    assert a == b
+    assert built.model_fields_set == validated.model_fields_set
+
+
+def test_build_pass_record_copies_shared_meta():
+    shared = {"mode": "v2"}
+    r1 = build_pass_record(step=1, draft="d", revision="r", meta=shared)
+    r1.meta["x"] = "y"
+    assert shared == {"mode": "v2"}
+
+
+def test_build_run_result_keeps_nonempty_check():
+    res = build_run_result(mode="v1", final_output="  ok ")
+    assert res.final_output == "ok"
+    assert (
+        res.model_dump().keys()
+        == RunResult(mode="v1", final_output="ok").model_dump().keys()
+    )
+    with pytest.raises(ValueError):
+        build_run_result(mode="v1", final_output="   ")
+
+
+def test_load_pass_records_validates_each_line():
+    from prompt_mode import utils
+    from prompt_mode.schemas import load_pass_records
+
+    recs = [
+        build_pass_record(step=i, draft=f"d{i}", revision=f"r{i}") for i in range(3)
+    ]
+    data = b"".join(utils.dump_jsonl_line(r) for r in recs)
+    assert load_pass_records(data) == recs
+    with pytest.raises(ValueError):
+        load_pass_records(b'{"step": -1, "draft": "d", "revision": "r"}\n')
+
+
+def test_constraints_replace_python_validators():
+    from prompt_mode.schemas import EvalScore
+
+    rec = PassRecord.model_validate({"step": 1, "draft": "  d ", "revision": "\nr\n"})
+    assert (rec.draft, rec.revision) == ("d", "r")
+    assert RunResult(mode="v2", final_output=" ok ").final_output == "ok"
+    with pytest.raises(ValueError):
+        RunResult(mode="v2", final_output="  ")
+
+    EvalScore(task_id="t", mode="v1", score_total=0.5, breakdown={"coverage": 1.0})
+    with pytest.raises(ValueError):
+        EvalScore(task_id="t", mode="v1", score_total=0.5, breakdown={"coverage": 1.5})
+
+
+def test_utc_now_iso_is_millisecond_z_and_cached():
+    import re
+
+    from prompt_mode.schemas import _utc_now_iso
+
+    a, b = _utc_now_iso(), _utc_now_iso()
+    assert re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z", a)
+    assert b >= a
+
+
+def test_pass_record_meta_defaults_to_empty_dict():
+    assert PassRecord(step=1, draft="d", revision="r").meta == {}
+    assert build_pass_record(step=1, draft="d", revision="r").meta == {}
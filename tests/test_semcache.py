@@ -0,0 +1,39 @@
+# tests/test_semcache.py
+from prompt_mode.semcache import SemanticCache, cosine, hash_embed
+
+
+def test_hash_embed_is_deterministic_and_normalized():
+    a = hash_embed("Please rewrite this email politely.")
+    b = hash_embed("Please rewrite this email politely.")
+    assert a == b
+    assert len(a) == 384
+    assert abs(cosine(a, a) - 1.0) < 1e-9
+
+
+def test_semantic_cache_hits_near_duplicates_only():
+    cache = SemanticCache(threshold=0.95)
+    base = (
+        "SQL Review\nFindings:\n- Avoid SELECT *; project only required columns.\n" * 3
+    )
+    cache.add(base, "critique-A")
+
+    assert cache.lookup(base) == "critique-A"
+    assert cache.lookup(base + " ") == "critique-A"  # whitespace-only change
+    assert cache.lookup("Completely unrelated bug report about null input.") is None
+
+
+def test_semantic_cache_evicts_oldest_when_full():
+    cache = SemanticCache(max_entries=2)
+    cache.add("one one one", "1")
+    cache.add("two two two", "2")
+    cache.add("three three three", "3")
+    assert len(cache) == 2
+    assert cache.lookup("one one one") is None
+
+
+def test_semantic_cache_only_matches_within_scope():
+    cache = SemanticCache()
+    cache.add("same draft text", "critique-A", scope="task-1")
+    assert cache.lookup("same draft text", scope="task-1") == "critique-A"
+    assert cache.lookup("same draft text", scope="task-2") is None
+    assert cache.lookup("same draft text") is None
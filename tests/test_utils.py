@@ -0,0 +1,220 @@
+# tests/test_utils.py
+import json
+
+from prompt_mode import utils
+
+
+def test_write_jsonl_single_buffer_roundtrip(tmp_path):
+    rows = [{"step": 1, "draft": "héllo"}, {"step": 2, "draft": "wörld"}]
+    out = tmp_path / "nested" / "run.jsonl"
+    utils.write_jsonl(out, rows)
+
+    text = out.read_text(encoding="utf-8")
+    assert text.endswith("\n")
+    assert [json.loads(line) for line in text.splitlines()] == rows
+    assert "héllo" in text  # non-ASCII kept as-is
+
+
+def test_dumps_jsonl_empty_is_empty():
+    assert utils.dumps_jsonl([]) == b""
+
+
+def test_rough_token_count_matches_ceil():
+    import math
+
+    for n in range(0, 200):
+        expected = 0 if n == 0 else max(1, math.ceil(n / 4))
+        assert utils.rough_token_count("x" * n) == expected
+
+
+def _reference_drop(messages, max_tokens):
+    # The original one-at-a-time policy, for equivalence checks
+    pinned, rest = messages[:1], list(messages[1:])
+    while (
+        len(rest) > 1 and utils.rough_messages_token_count(pinned + rest) > max_tokens
+    ):
+        rest.pop(0)
+    return pinned + rest
+
+
+def test_truncate_messages_drops_oldest_like_one_at_a_time_policy():
+    msgs = [{"role": "system", "content": "sys " * 10}] + [
+        {"role": "user" if i % 2 else "assistant", "content": f"turn {i} " * (5 + i)}
+        for i in range(8)
+    ]
+    for budget in (40, 80, 120, 200, 400, 10_000):
+        expected = _reference_drop(msgs, budget)
+        if utils.rough_messages_token_count(expected) <= budget:
+            assert utils.truncate_messages(msgs, budget) == expected
+
+
+def test_message_bundle_roundtrip():
+    msgs = [
+        {"role": "system", "content": "hello world"},
+        {"role": "user", "content": "hi"},
+    ]
+    bundle = utils.MessageBundle.from_messages(msgs)
+    assert bundle.tokens == [3, 1]
+    assert bundle.total_tokens == 4
+    assert bundle.to_chat() == msgs
+
+
+def test_dump_jsonl_line_is_one_utf8_line():
+    from prompt_mode.schemas import PassRecord
+
+    rec = PassRecord(step=1, draft="héllo", revision="wörld")
+    line = utils.dump_jsonl_line(rec)
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert json.loads(line) == json.loads(rec.model_dump_json())
+    assert "héllo".encode("utf-8") in line
+
+
+def test_write_jsonl_models_roundtrip(tmp_path):
+    from prompt_mode.schemas import PassRecord
+
+    recs = [PassRecord(step=i, draft=f"d{i}", revision=f"r{i}") for i in range(5)]
+    out = tmp_path / "t" / "run.jsonl"
+    utils.write_jsonl_models(out, recs)
+
+    data = out.read_bytes()
+    assert data == b"".join(utils.dump_jsonl_line(r) for r in recs)
+    assert [json.loads(line)["step"] for line in data.splitlines()] == list(range(5))
+
+
+def _sanitize_reference(text):
+    # The original four-pass pipeline, kept as the behavioural spec.
+    import html
+    import re
+
+    if not text:
+        return ""
+    t = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f]", "", text)
+    t = re.sub(r"[ \t]{2,}", "  ", t)
+    t = re.sub(r"\n{3,}", "\n\n", t)
+    t = html.unescape(t)
+    t = re.sub(r"`{4,}", "```", t)
+    return t.strip()
+
+
+def test_sanitize_text_single_pass_matches_reference():
+    samples = [
+        "",
+        "plain text",
+        "a \x01 b\x02\x0b\tc\t\t\td",
+        "x\n\n\n\n\ny\r\n\r\n",
+        "`````sql\nSELECT 1\n`````",
+        "&lt;b&gt; &amp;amp; &#96;&#96;&#96;&#96; &#10;&#10;&#10;",
+        "  lead & trail \x1f  ",
+        "``" + "\x00" + "``",
+    ]
+    for s in samples:
+        assert utils.sanitize_text(s) == _sanitize_reference(s), repr(s)
+
+
+def test_truncate_messages_truncates_within_budget_without_dropping_last():
+    msgs = [
+        {"role": "system", "content": "sys " * 50},
+        {"role": "user", "content": "old " * 400},
+        {"role": "user", "content": "new " * 400},
+    ]
+    out = utils.truncate_messages(msgs, 300)
+    assert out[0] == msgs[0]
+    assert out[-1]["content"].startswith("new")
+    assert utils.rough_messages_token_count(out) <= 300 + utils.rough_token_count(
+        " …[truncated]"
+    )
+
+
+def test_diff_text_trims_shared_lines_but_keeps_full_text_offsets():
+    import difflib
+
+    a_lines = [f"line {i}" for i in range(100)]
+    b_lines = list(a_lines)
+    b_lines[60] = "changed"
+    a, b = "\n".join(a_lines), "\n".join(b_lines)
+    expected = "\n".join(
+        difflib.unified_diff(
+            a_lines, b_lines, fromfile="a", tofile="b", n=2, lineterm=""
+        )
+    )
+    assert utils.diff_text(a, b) == expected
+    assert "@@ -59,5 +59,5 @@" in utils.diff_text(a, b)
+
+
+def test_diff_text_summarizes_huge_changes():
+    a = "\n".join(f"a{i}" for i in range(1000))
+    b = "\n".join(f"b{i}" for i in range(1000))
+    out = utils.diff_text("head\n" + a, "head\n" + b)
+    assert out.startswith("--- a\n+++ b\n@@ -2,1000 +2,1000 @@")
+    assert "too large to diff" in out
+
+
+def test_rough_messages_token_count_rounds_per_message():
+    msgs = [{"role": "user", "content": "x" * n} for n in (0, 1, 4, 5, 100, 257)]
+    msgs.append({"role": "user"})
+    assert utils.rough_messages_token_count(msgs) == sum(
+        utils.rough_token_count(m.get("content", "")) for m in msgs
+    )
+    assert (
+        utils.rough_messages_token_count([{"role": "user", "content": "abcd"}] * 2) == 2
+    )
+
+
+def test_difflib_and_html_are_imported_lazily():
+    import os
+    import subprocess
+    import sys
+
+    code = "import sys, prompt_mode.core; assert 'difflib' not in sys.modules and 'html' not in sys.modules"
+    subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+
+def test_truncate_messages_is_copy_on_write():
+    small = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+    out = utils.truncate_messages(small, 100)
+    assert out == small and out is not small
+    assert out[1] is small[1]  # under budget: no dict copies
+
+    big = [
+        {"role": "system", "content": "sys"},
+        {"role": "user", "content": "word " * 400},
+    ]
+    out = utils.truncate_messages(big, 50)
+    assert out[0] is big[0]
+    assert (
+        out[1] is not big[1] and big[1]["content"] == "word " * 400
+    )  # input untouched
+
+
+def test_diff_text_empty_side_fast_path_matches_difflib():
+    import difflib
+
+    for a, b in [("", "one"), ("", "one\ntwo\n"), ("x\ny", ""), ("only\n", "")]:
+        expected = "\n".join(
+            difflib.unified_diff(
+                a.splitlines(),
+                b.splitlines(),
+                fromfile="a",
+                tofile="b",
+                n=2,
+                lineterm="",
+            )
+        )
+        assert utils.diff_text(a, b) == expected
+    text = "same\ntext"
+    assert utils.diff_text(text, text) == ""
+
+
+def test_diff_text_splits_on_newline_only():
+    for text in ["a", "a\n", "a\n\n", "\n", "a\nb", "a\n\nb\n"]:
+        assert utils._split_lines(text) == text.splitlines()
+    # Other line separators stay inside a line (documented trade-off)
+    assert utils._split_lines("a\rb c\n") == ["a\rb c"]
+    assert (
+        utils.diff_text("x\r\ny\r\n", "x\r\nz\r\n")
+        == "--- a\n+++ b\n@@ -1,2 +1,2 @@\n x\r\n-y\r\n+z\r"
+    )